@@ -0,0 +1,130 @@
+"""
+Write-behind buffer for UserSession.last_activity_at.
+
+Authenticated requests only record "seen at" timestamps in memory. Records
+are coalesced per session and written in batched ``UPDATE ... FROM (VALUES ...)``
+statements when the buffer reaches ``SESSION_ACTIVITY_FLUSH_SIZE`` entries,
+every ``SESSION_ACTIVITY_FLUSH_INTERVAL`` seconds from a background thread,
+and once more at interpreter shutdown. Activity newer than
+``SESSION_ACTIVITY_STALENESS`` seconds for the same session is not recorded again,
+so last_activity_at may lag by up to that tolerance plus the flush interval.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityBuffer:
+    """Coalesces activity timestamps per session and flushes them in batches."""
+    batch_size = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._recorded = {}
+        self._flushed_at = time.monotonic()
+        self._worker = None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'SESSION_ACTIVITY_FLUSH_INTERVAL', 30)
+
+    @property
+    def flush_size(self):
+        return getattr(settings, 'SESSION_ACTIVITY_FLUSH_SIZE', 500)
+
+    @property
+    def staleness(self):
+        return getattr(settings, 'SESSION_ACTIVITY_STALENESS', 60)
+
+    def record(self, session_id):
+        """Record activity for the session."""
+        now = timezone.now()
+        with self._lock:
+            last_recorded = self._recorded.get(session_id)
+            if last_recorded is not None and (now - last_recorded).total_seconds() < self.staleness:
+                return
+            self._pending[session_id] = now
+            self._recorded[session_id] = now
+            due = (
+                len(self._pending) >= self.flush_size
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            )
+        self._ensure_worker()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all pending activity to the database; return the number of sessions written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flushed_at = time.monotonic()
+                self._forget_stale()
+            if not pending:
+                return 0
+            try:
+                items = list(pending.items())
+                for start in range(0, len(items), self.batch_size):
+                    self._write(items[start:start + self.batch_size])
+            except Exception:
+                logger.exception('Failed to flush session activity; will retry')
+                with self._lock:
+                    for session_id, seen_at in pending.items():
+                        if session_id not in self._pending or self._pending[session_id] < seen_at:
+                            self._pending[session_id] = seen_at
+                return 0
+            return len(pending)
+
+    def _forget_stale(self):
+        """Drop staleness bookkeeping that can no longer suppress a record."""
+        now = timezone.now()
+        self._recorded = {
+            session_id: seen_at for session_id, seen_at in self._recorded.items()
+            if (now - seen_at).total_seconds() < self.staleness
+        }
+
+    def _write(self, items):
+        values = ', '.join(['(%s::bigint, %s::timestamptz)'] * len(items))
+        params = [value for item in items for value in item]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE user_sessions AS s
+                SET last_activity_at = v.seen_at
+                FROM (VALUES {values}) AS v(session_id, seen_at)
+                WHERE s.id = v.session_id
+                AND s.last_activity_at < v.seen_at
+                """,
+                params
+            )
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name='session-activity-flush', daemon=True)
+            self._worker.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.flush_interval, 1))
+            try:
+                self.flush()
+            finally:
+                # The worker thread owns its own connection; do not keep it open while idle
+                connection.close()
+
+
+activity_buffer = SessionActivityBuffer()
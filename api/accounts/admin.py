@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.utils.translation import gettext_lazy as _
-from .models import User, Role, Permission, RolePermission, UserSession
+from .models import User, Role, Permission, RolePermission, UserSession, UserSessionDailyRollup
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -85,3 +85,12 @@ class UserSessionAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'ip_address', 'user_agent']
     readonly_fields = ['created_at', 'last_activity_at']
     ordering = ['-created_at']
+
+
+@admin.register(UserSessionDailyRollup)
+class UserSessionDailyRollupAdmin(admin.ModelAdmin):
+    """Admin configuration for UserSessionDailyRollup model."""
+    list_display = ['day', 'user', 'language', 'timezone', 'screen_size', 'login_count']
+    list_filter = ['day', 'language']
+    search_fields = ['user__email']
+    ordering = ['-day']
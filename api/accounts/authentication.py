@@ -0,0 +1,94 @@
+"""
+DRF authentication classes.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import token_versions
+from .roles import RoleChecksMixin, role_registry
+from .tokens import get_token_session_id, get_token_version
+
+
+class VersionedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that rejects tokens revoked by a token version bump."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if get_token_version(validated_token) != user.token_version:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user
+
+
+class TokenPrincipal(RoleChecksMixin):
+    """Authenticated user built from token claims and the cached auth state.
+
+    Carries what permission checks and visibility filters need (id, role,
+    permissions via the role registry). Any other attribute loads the full
+    User row on first access.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, state, validated_token):
+        self.id = self.pk = user_id
+        self.role_id = state['role_id']
+        self.account_status = state['account_status']
+        self.is_active = state['is_active']
+        self.token_version = state['token_version']
+        self.session_id = get_token_session_id(validated_token)
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenPrincipal, get_user_model())):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return f'TokenPrincipal {self.pk}'
+
+    @property
+    def role(self):
+        return role_registry.get(self.role_id)
+
+    def get_user(self):
+        """Return the full User, loading it on first use."""
+        if self._user is None:
+            self._user = get_user_model().objects.get(pk=self.pk)
+        return self._user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not load the User row.
+
+    The token version, role and account state come from the cached auth
+    state (accounts/revocation.py), so a warm request authenticates without
+    a database query. ``request.user`` is a TokenPrincipal; use it on
+    endpoints that mostly need the user's id and role.
+    """
+
+    def get_user(self, validated_token):
+        # The claim may be serialized as a string; compare ids as the model does
+        try:
+            user_id = get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        state = token_versions.get_state(user_id)
+        if state is None or state['account_status'] != get_user_model().AccountStatus.ACTIVE:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if get_token_version(validated_token) != state['token_version']:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return TokenPrincipal(user_id, state, validated_token)
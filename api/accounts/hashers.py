@@ -0,0 +1,19 @@
+"""
+Password hashers whose work factor comes from settings.yaml.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import BCryptPasswordHasher
+
+
+class ConfiguredBCryptPasswordHasher(BCryptPasswordHasher):
+    """bcrypt hasher using the ``PASSWORD_HASH_BCRYPT_ROUNDS`` cost.
+    
+    The algorithm name stays "bcrypt", so existing hashes keep verifying.
+    Hashes stored with any other cost fail must_update(), and a successful
+    login re-hashes them with the configured cost (see accounts/hashing.py).
+    Use ``manage.py calibrate_hashers`` to pick the cost for this hardware.
+    """
+    
+    @property
+    def rounds(self):
+        return getattr(settings, 'PASSWORD_HASH_BCRYPT_ROUNDS', BCryptPasswordHasher.rounds)
@@ -0,0 +1,162 @@
+"""
+Bounded worker pool for password hashing.
+
+bcrypt is deliberately slow, so hashing runs in a fixed-size thread pool
+(bcrypt and PBKDF2 release the GIL) instead of on request threads or the
+event loop. At most ``PASSWORD_HASH_WORKERS`` hashes run at once and at most
+``PASSWORD_HASH_QUEUE_SIZE`` more wait for a worker; beyond that submissions
+fail fast with HashPoolBusy so a login storm is shed instead of queued
+without bound. ``stats()`` reports queue depth, rejections and timings.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, is_password_usable, make_password
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def verify_password(raw_password, encoded):
+    """Check ``raw_password`` against ``encoded``; return (is_correct, must_update).
+
+    A missing or unusable ``encoded`` still costs one hash, so response times
+    do not reveal whether an account exists.
+    """
+    if encoded is None or not is_password_usable(encoded):
+        make_password(raw_password)
+        return False, False
+    upgrades = []
+    is_correct = check_password(raw_password, encoded, setter=upgrades.append)
+    return is_correct, bool(upgrades)
+
+
+class PasswordHashPool:
+    """Runs password hashing on a bounded thread pool with a bounded queue."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+        self._running = 0
+        self._counters = {
+            'completed': 0,
+            'rejected': 0,
+            'max_in_flight': 0,
+            'wait_seconds': 0.0,
+            'hash_seconds': 0.0,
+        }
+
+    @property
+    def workers(self):
+        return getattr(settings, 'PASSWORD_HASH_WORKERS', 4)
+
+    @property
+    def queue_size(self):
+        return getattr(settings, 'PASSWORD_HASH_QUEUE_SIZE', 64)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='password-hash'
+                    )
+        return self._executor
+
+    def submit(self, fn, *args):
+        """Queue ``fn(*args)`` on the pool and return its future.
+
+        Raises HashPoolBusy when every worker is busy and the queue is full.
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_size:
+                self._counters['rejected'] += 1
+                raise HashPoolBusy('Too many password hashes in progress')
+            self._in_flight += 1
+            self._counters['max_in_flight'] = max(self._counters['max_in_flight'], self._in_flight)
+        try:
+            future = self._get_executor().submit(self._run, time.monotonic(), fn, args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, queued_at, fn, args):
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+            self._counters['wait_seconds'] += started - queued_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._counters['completed'] += 1
+                self._counters['hash_seconds'] += time.monotonic() - started
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool and wait for the result."""
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        """Run ``fn(*args)`` on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def make_password(self, raw_password):
+        return self.run(make_password, raw_password)
+
+    async def amake_password(self, raw_password):
+        return await self.arun(make_password, raw_password)
+
+    def check_user_password(self, user, raw_password):
+        """Check the password of ``user`` (None for an unknown account) with one hash.
+
+        A correct password stored with an outdated hasher or work factor is
+        re-hashed and saved; that upgrade is the only case with a second hash.
+        """
+        is_correct, must_update = self.run(verify_password, raw_password, user.password if user else None)
+        if user is not None and is_correct and must_update:
+            user.password = self.make_password(raw_password)
+            user.save(update_fields=['password'])
+        return user is not None and is_correct
+
+    async def acheck_user_password(self, user, raw_password):
+        """Async variant of check_user_password."""
+        is_correct, must_update = await self.arun(verify_password, raw_password, user.password if user else None)
+        if user is not None and is_correct and must_update:
+            user.password = await self.amake_password(raw_password)
+            await sync_to_async(user.save)(update_fields=['password'])
+        return user is not None and is_correct
+
+    def stats(self):
+        """Return a snapshot of pool occupancy and timing counters."""
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight, running = self._in_flight, self._running
+        completed = counters.pop('completed')
+        wait_seconds = counters.pop('wait_seconds')
+        hash_seconds = counters.pop('hash_seconds')
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'running': running,
+            'queued': in_flight - running,
+            'completed': completed,
+            'avg_wait_ms': round(wait_seconds * 1000 / completed, 2) if completed else 0.0,
+            'avg_hash_ms': round(hash_seconds * 1000 / completed, 2) if completed else 0.0,
+            **counters,
+        }
+
+
+password_hashers = PasswordHashPool()
@@ -0,0 +1,92 @@
+"""
+Django management command to benchmark JWT issuance on the login path.
+Compares the previous routine (encode the tokens, then decode the access
+token payload once for the response body and again for the cookies) with
+IssuedTokens, which reads expiries from the token objects and sets the
+cookies in one pass.
+"""
+
+import base64
+import json
+import statistics
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.response import Response
+
+from accounts.models import User
+from accounts.tokens import IssuedTokens, create_session_tokens
+
+
+def legacy_expires_at(access_token):
+    """Decode the encoded access token payload to find its expiry, as logins used to."""
+    payload = access_token.split('.')[1]
+    payload += '=' * (4 - len(payload) % 4)
+    exp = json.loads(base64.urlsafe_b64decode(payload))['exp']
+    return datetime.fromtimestamp(exp, tz=dt_timezone.utc).isoformat(), int(exp - time.time())
+
+
+def legacy_issue(user):
+    refresh = create_session_tokens(user)
+    access_token = str(refresh.access_token)
+    refresh_token = str(refresh)
+    # Once on a throwaway response for the body, once on the real response
+    expires_at, _ = legacy_expires_at(access_token)
+    response = Response({'access_token': access_token, 'refresh_token': refresh_token, 'expires_at': expires_at})
+    for _ in range(2):
+        _, max_age = legacy_expires_at(access_token)
+        for name in ('access_token', 'access_token_expires_at', 'refresh_token'):
+            response.delete_cookie(name, path='/')
+        response.set_cookie('access_token', access_token, max_age=max_age, httponly=True, path='/')
+        response.set_cookie('access_token_expires_at', expires_at, max_age=max_age, httponly=True, path='/')
+        response.set_cookie('refresh_token', refresh_token, max_age=86400, httponly=True, path='/')
+    return response
+
+
+def single_pass_issue(user):
+    tokens = IssuedTokens(create_session_tokens(user))
+    return tokens.set_cookies(Response(tokens.as_dict()))
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks per-login token issuance: legacy double decode vs single-pass IssuedTokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Tokens issued per measurement (default: 2000)',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='Measurements per variant; the median is reported (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError('No users found; run create_dummy_data first')
+
+        iterations = max(options['iterations'], 1)
+        rounds = max(options['rounds'], 1)
+        self.stdout.write(f'Issuing {iterations} token pairs x {rounds} rounds for {user.email}...')
+
+        results = {}
+        for label, issue in (('legacy', legacy_issue), ('single-pass', single_pass_issue)):
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    issue(user)
+                timings.append((time.perf_counter() - started) * 1_000_000 / iterations)
+            results[label] = statistics.median(timings)
+            self.stdout.write(f'  {label}: {results[label]:.1f} µs per login')
+
+        saved = results['legacy'] - results['single-pass']
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Single-pass issuance saves {saved:.1f} µs ({saved / results["legacy"]:.0%}) per login')
+        )
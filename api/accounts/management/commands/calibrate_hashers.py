@@ -0,0 +1,159 @@
+"""
+Django management command to calibrate password hashing cost.
+Benchmarks the configured PASSWORD_HASHERS on this machine, recommends a
+bcrypt cost for a target verify latency and reports how many users still
+have hashes with legacy parameters.
+"""
+
+import math
+import statistics
+import time
+
+from django.contrib.auth.hashers import get_hashers, get_hashers_by_algorithm
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 20
+BENCHMARK_PASSWORD = 'calibrate-hashers-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks password hashers, recommends a bcrypt cost and reports users on legacy hash parameters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=250.0,
+            help='Target time for one password verification on one core (default: 250)',
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=3,
+            help='Verifications timed per measurement; the median is used (default: 3)',
+        )
+        parser.add_argument(
+            '--report-only',
+            action='store_true',
+            help='Only report stored hash parameters, skip benchmarking',
+        )
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            self.benchmark(options['target_ms'], max(options['samples'], 1))
+        self.report_stored_hashes()
+
+    def time_verify(self, hasher, samples, salt=None):
+        """Return the median time in ms of verifying a password hashed by ``hasher``."""
+        encoded = hasher.encode(BENCHMARK_PASSWORD, salt or hasher.salt())
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.verify(BENCHMARK_PASSWORD, encoded)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def benchmark(self, target_ms, samples):
+        self.stdout.write(f'Benchmarking password hashers (target {target_ms:g} ms per verify)...')
+
+        for index, hasher in enumerate(get_hashers()):
+            label = f'{hasher.algorithm}{" (preferred)" if index == 0 else ""}'
+            try:
+                elapsed = self.time_verify(hasher, samples)
+            except ValueError as e:
+                # Optional hashing libraries (argon2-cffi, ...) may be missing
+                self.stdout.write(f'  {label}: skipped ({e})')
+                continue
+
+            if hasattr(hasher, 'rounds'):
+                self.stdout.write(f'  {label}: cost {hasher.rounds} -> {elapsed:.1f} ms')
+            elif hasattr(hasher, 'iterations'):
+                self.stdout.write(f'  {label}: {hasher.iterations} iterations -> {elapsed:.1f} ms')
+                recommended = max(int(hasher.iterations * target_ms / elapsed), 1)
+                self.stdout.write(f'    ~{recommended} iterations for {target_ms:g} ms')
+            else:
+                self.stdout.write(f'  {label}: {elapsed:.1f} ms')
+
+            if hasattr(hasher, 'rounds') and index == 0:
+                self.recommend_bcrypt_rounds(hasher, elapsed, target_ms, samples)
+
+    def recommend_bcrypt_rounds(self, hasher, elapsed, target_ms, samples):
+        """Recommend the highest bcrypt cost whose verify time stays within the target."""
+        # Each extra round doubles the work
+        rounds = hasher.rounds + math.floor(math.log2(target_ms / elapsed))
+        rounds = min(max(rounds, MIN_BCRYPT_ROUNDS), MAX_BCRYPT_ROUNDS)
+        bcrypt = hasher._load_library()
+        measured = self.time_verify(hasher, samples, bcrypt.gensalt(rounds))
+        while measured > target_ms and rounds > MIN_BCRYPT_ROUNDS:
+            rounds -= 1
+            measured = self.time_verify(hasher, samples, bcrypt.gensalt(rounds))
+
+        if rounds == hasher.rounds:
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Current bcrypt cost {rounds} matches the target (~{measured:.1f} ms)')
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Recommended bcrypt cost: {rounds} (~{measured:.1f} ms, currently {hasher.rounds}). '
+                    f'Set hashing.bcrypt_rounds in settings.yaml; users are re-hashed on their next login.'
+                )
+            )
+
+    def report_stored_hashes(self):
+        """Count users per stored hash algorithm and parameters."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    split_part(password, '$', 1) AS algorithm,
+                    CASE
+                        WHEN password LIKE 'bcrypt%' THEN 'cost ' || split_part(password, '$', 4)
+                        WHEN password LIKE 'pbkdf2%' THEN split_part(password, '$', 2) || ' iterations'
+                        WHEN password LIKE 'argon2%' THEN split_part(password, '$', 4)
+                        WHEN password LIKE 'scrypt%' THEN 'N=' || split_part(password, '$', 3)
+                        ELSE ''
+                    END AS parameters,
+                    COUNT(*),
+                    MIN(password)
+                FROM users
+                WHERE password <> '' AND password NOT LIKE '!%'
+                GROUP BY 1, 2
+                ORDER BY 3 DESC
+                """
+            )
+            rows = cursor.fetchall()
+            cursor.execute("SELECT COUNT(*) FROM users WHERE password = '' OR password LIKE '!%'")
+            unusable = cursor.fetchone()[0]
+
+        preferred = get_hashers()[0]
+        hashers_by_algorithm = get_hashers_by_algorithm()
+        total = sum(row[2] for row in rows)
+        legacy = 0
+
+        self.stdout.write('Stored password hashes:')
+        for algorithm, parameters, count, sample in rows:
+            if algorithm not in hashers_by_algorithm:
+                state = 'unknown algorithm, cannot log in'
+                legacy += count
+            elif algorithm == preferred.algorithm and not preferred.must_update(sample):
+                state = 'current'
+            else:
+                state = 'legacy'
+                legacy += count
+            description = f'{algorithm} {parameters}'.strip()
+            self.stdout.write(f'  {description}: {count} users ({state})')
+        if unusable:
+            self.stdout.write(f'  no usable password: {unusable} users')
+
+        if legacy:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{legacy} of {total} users have legacy hash parameters; '
+                    f'they are re-hashed with {preferred.algorithm} on their next successful login'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {total} users have current hash parameters'))
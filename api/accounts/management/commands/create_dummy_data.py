@@ -9,8 +9,7 @@ from django.utils import timezone
 from datetime import date, timedelta
 from tasks.models import UserTask
 from accounts.models import Role, Permission, RolePermission
-import yaml
-from pathlib import Path
+from taskboard.config import config
 import random
 
 User = get_user_model()
@@ -28,13 +27,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         # Load settings from settings.yaml
-        BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
-        SETTINGS_YAML_PATH = BASE_DIR / 'settings.yaml'
-        
         try:
-            with open(SETTINGS_YAML_PATH, 'r') as f:
-                config = yaml.safe_load(f)
-            admin_password = config.get('admin', {}).get('password', 'admin123')
+            admin_password = config.get_str('admin', 'password', 'admin123')
         except Exception as e:
             self.stdout.write(
                 self.style.WARNING(f'Could not load settings.yaml: {e}')
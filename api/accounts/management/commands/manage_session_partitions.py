@@ -0,0 +1,87 @@
+"""
+Django management command to maintain the monthly user_sessions partitions.
+Creates partitions for the coming months, then rolls sessions older than the
+retention period up into daily aggregates and drops (or detaches) their
+partitions. Meant to run daily from cron.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    current_month,
+    ensure_partitions,
+    list_partitions,
+    month_bounds,
+    partition_name,
+    retire_default_rows,
+    retire_partition,
+)
+
+
+class Command(BaseCommand):
+    help = 'Creates upcoming user_sessions partitions and rolls up and drops partitions past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=getattr(settings, 'SESSION_RETENTION_MONTHS', 12),
+            help='Full months of sessions to keep besides the current one; 0 keeps everything '
+                 '(default: sessions.retention_months)',
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=getattr(settings, 'SESSION_PARTITIONS_AHEAD', 2),
+            help='Months of partitions to create ahead of the current one (default: sessions.partitions_ahead)',
+        )
+        parser.add_argument(
+            '--detach',
+            action='store_true',
+            help='Detach expired partitions and keep them as standalone tables instead of dropping them',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show what would be created and retired',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        existing = list_partitions()
+
+        upcoming = [add_months(current_month(), offset) for offset in range(max(options['ahead'], 0) + 1)]
+        missing = [month for month in upcoming if month not in existing]
+        if dry_run:
+            for month in missing:
+                self.stdout.write(f'Would create {partition_name(month)}')
+        else:
+            for month in ensure_partitions(max(options['ahead'], 0)):
+                self.stdout.write(f'  Created {partition_name(month)}')
+            self.stdout.write(self.style.SUCCESS(f'✓ Partitions exist up to {upcoming[-1]:%Y-%m}'))
+
+        retention = options['retention_months']
+        if retention <= 0:
+            self.stdout.write('Retention disabled; keeping all sessions')
+            return
+
+        cutoff = add_months(current_month(), -retention)
+        expired = [month for month in existing if month < cutoff]
+        action, done = ('detach', 'detached') if options['detach'] else ('drop', 'dropped')
+        for month in expired:
+            if dry_run:
+                self.stdout.write(f'Would roll up and {action} {partition_name(month)}')
+                continue
+            sessions = retire_partition(month, detach=options['detach'])
+            self.stdout.write(f'  Rolled up {sessions} sessions and {done} {partition_name(month)}')
+
+        if not dry_run:
+            stray = retire_default_rows(month_bounds(cutoff)[0])
+            if stray:
+                self.stdout.write(f'  Rolled up and deleted {stray} sessions from {DEFAULT_PARTITION}')
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Sessions before {cutoff:%Y-%m} retired ({len(expired)} partitions)')
+            )
@@ -1,26 +1,51 @@
 """
 Middleware to update UserSession last_activity_at on authenticated requests.
 """
-from django.utils import timezone
-from .models import UserSession
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .activity import activity_buffer
+from .tokens import get_token_session_id
 
 
 class UpdateSessionActivityMiddleware:
-    """Middleware to update session activity timestamp."""
-    
+    """Middleware to record session activity in the write-behind buffer.
+
+    Supports both sync and async request handling, so under ASGI it does
+    not force async views onto Django's single sync thread.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Process request
         response = self.get_response(request)
-        
-        # Update session activity if user is authenticated
-        if request.user.is_authenticated:
-            # Get the most recent session for this user
-            session = UserSession.objects.filter(user=request.user).order_by('-created_at').first()
-            if session:
-                # Update last_activity_at (this will trigger auto_now=True)
-                UserSession.objects.filter(id=session.id).update(last_activity_at=timezone.now())
-        
+
+        session_id = self.get_session_id(request)
+        if session_id is not None:
+            activity_buffer.record(session_id)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        session_id = self.get_session_id(request)
+        if session_id is not None:
+            # record() may flush the buffer to the database
+            await sync_to_async(activity_buffer.record)(session_id)
+
         return response
+
+    def get_session_id(self, request):
+        """Return the session named in the access token DRF authenticated the request with."""
+        # Record activity of the session named in the access token; the
+        # buffer coalesces it and updates last_activity_at in batches
+        return get_token_session_id(getattr(request, 'auth', None))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Embedded in issued JWTs; incrementing it revokes all of them'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='login_count',
+            field=models.PositiveIntegerField(default=0, help_text='Sessions opened so far; numbers each new UserSession'),
+        ),
+        # Continue numbering after the highest connection number already handed out
+        migrations.RunSQL(
+            sql="""
+                UPDATE users
+                SET login_count = sessions.max_connection_number
+                FROM (
+                    SELECT user_id, MAX(connection_number) AS max_connection_number
+                    FROM user_sessions
+                    GROUP BY user_id
+                ) AS sessions
+                WHERE sessions.user_id = users.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
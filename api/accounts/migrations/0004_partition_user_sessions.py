@@ -0,0 +1,151 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+SESSION_COLUMNS = """
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    ip_address inet NOT NULL,
+    user_agent text NOT NULL,
+    screen_size varchar(20) NOT NULL,
+    timezone varchar(50) NOT NULL,
+    language varchar(10) NOT NULL,
+    connection_number integer NOT NULL,
+    extra_metadata jsonb NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    last_activity_at timestamp with time zone NOT NULL,
+    user_id bigint NOT NULL
+"""
+
+COPY_SESSIONS = """
+    INSERT INTO user_sessions
+    SELECT id, ip_address, user_agent, screen_size, timezone, language, connection_number,
+           extra_metadata, created_at, last_activity_at, user_id
+    FROM {source};
+    SELECT setval(
+        pg_get_serial_sequence('user_sessions', 'id'),
+        COALESCE((SELECT MAX(id) FROM user_sessions), 1),
+        EXISTS (SELECT 1 FROM user_sessions)
+    );
+"""
+
+# Replaces user_sessions with an empty table of the same columns. The old
+# table, its primary key, user_id foreign key, user_id index and id sequence
+# are renamed with ``aside`` in place of "user_sessions"; the new table takes
+# over their original names, looked up in the catalogs rather than assumed.
+SWAP_SESSIONS_TABLE = """
+    DO $$
+    DECLARE
+        pkey_name text;
+        fkey_name text;
+        user_index_name text;
+        sequence_name text := pg_get_serial_sequence('user_sessions', 'id');
+    BEGIN
+        SELECT conname INTO STRICT pkey_name FROM pg_constraint
+        WHERE conrelid = 'user_sessions'::regclass AND contype = 'p';
+        SELECT conname INTO STRICT fkey_name FROM pg_constraint
+        WHERE conrelid = 'user_sessions'::regclass AND contype = 'f' AND confrelid = 'users'::regclass;
+        SELECT indexname INTO STRICT user_index_name FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = 'user_sessions'
+        AND indexdef LIKE '%USING btree (user_id)';
+
+        ALTER TABLE user_sessions RENAME TO {aside};
+        EXECUTE format('ALTER TABLE {aside} RENAME CONSTRAINT %I TO {aside}_pkey', pkey_name);
+        EXECUTE format('ALTER TABLE {aside} RENAME CONSTRAINT %I TO {aside}_user_id_fk', fkey_name);
+        EXECUTE format('ALTER INDEX %I RENAME TO {aside}_user_id', user_index_name);
+        IF sequence_name IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s RENAME TO {aside}_id_seq', sequence_name);
+        END IF;
+
+        EXECUTE format(
+            'CREATE TABLE user_sessions (%s, CONSTRAINT %I PRIMARY KEY ({primary_key})) {partitioning}',
+            $columns${columns}$columns$, pkey_name
+        );
+        EXECUTE format(
+            'ALTER TABLE user_sessions ADD CONSTRAINT %I FOREIGN KEY (user_id) REFERENCES users (id) '
+            'DEFERRABLE INITIALLY DEFERRED',
+            fkey_name
+        );
+        EXECUTE format('CREATE INDEX %I ON user_sessions (user_id)', user_index_name);
+    END $$;
+"""
+
+# The partition key has to be part of the primary key, so the database
+# primary key becomes (id, created_at). The model keeps id as its primary
+# key: ids stay unique through the identity sequence, and Django only ever
+# looks sessions up by id.
+PARTITION_SESSIONS = f"""
+    {SWAP_SESSIONS_TABLE.format(
+        aside='user_sessions_unpartitioned',
+        primary_key='id, created_at',
+        partitioning='PARTITION BY RANGE (created_at)',
+        columns=SESSION_COLUMNS,
+    )}
+
+    -- Catches rows outside the monthly partitions (see manage_session_partitions)
+    CREATE TABLE user_sessions_default PARTITION OF user_sessions DEFAULT;
+
+    -- One partition per UTC month, from the oldest session to two months ahead
+    DO $$
+    DECLARE
+        month date := date_trunc('month', LEAST(
+            (SELECT MIN(created_at) FROM user_sessions_unpartitioned), now()
+        ) AT TIME ZONE 'UTC')::date;
+    BEGIN
+        WHILE month <= (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '2 months')::date LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF user_sessions FOR VALUES FROM (%L) TO (%L)',
+                'user_sessions_p' || to_char(month, 'YYYY_MM'),
+                month::timestamp AT TIME ZONE 'UTC',
+                (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            month := (month + interval '1 month')::date;
+        END LOOP;
+    END $$;
+
+    {COPY_SESSIONS.format(source='user_sessions_unpartitioned')}
+    DROP TABLE user_sessions_unpartitioned;
+"""
+
+UNPARTITION_SESSIONS = f"""
+    {SWAP_SESSIONS_TABLE.format(
+        aside='user_sessions_partitioned',
+        primary_key='id',
+        partitioning='',
+        columns=SESSION_COLUMNS,
+    )}
+
+    {COPY_SESSIONS.format(source='user_sessions_partitioned')}
+    DROP TABLE user_sessions_partitioned;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_login_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSessionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='UTC day the sessions were created on')),
+                ('screen_size', models.CharField(blank=True, max_length=20)),
+                ('timezone', models.CharField(blank=True, max_length=50)),
+                ('language', models.CharField(blank=True, max_length=10)),
+                ('login_count', models.PositiveIntegerField(default=0, help_text='Sessions created that day with these attributes')),
+                ('user', models.ForeignKey(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, related_name='session_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'user session daily rollup',
+                'verbose_name_plural': 'user session daily rollups',
+                'db_table': 'user_session_daily_rollups',
+                'ordering': ['-day'],
+                'unique_together': {('day', 'user', 'screen_size', 'timezone', 'language')},
+            },
+        ),
+        migrations.RunSQL(sql=PARTITION_SESSIONS, reverse_sql=UNPARTITION_SESSIONS),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:13
+
+import warnings
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import DatabaseError, migrations, models, transaction
+import django.db.models.functions.text
+
+MISSING_TRIGRAM_WARNING = (
+    'pg_trgm is not installed, so the user directory search indexes were not built '
+    'and searches scan the users table. Have a superuser run "CREATE EXTENSION pg_trgm;" '
+    'in this database, then rebuild them with '
+    '"manage.py migrate accounts 0004 && manage.py migrate accounts".'
+)
+
+
+class OptionalTrigramExtension(TrigramExtension):
+    """Install pg_trgm if the database role may; otherwise warn and go on.
+
+    CREATE EXTENSION needs a superuser (or a trusted extension and CREATE on
+    the database) and the contrib package on the server. Without it the
+    trigram indexes below are skipped and the search still works unindexed.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                super().database_forwards(app_label, schema_editor, from_state, to_state)
+        except DatabaseError as exc:
+            warnings.warn(f'Could not create extension {self.name} ({exc}). {MISSING_TRIGRAM_WARNING}')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # Other database objects may use an extension a superuser installed
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                super().database_backwards(app_label, schema_editor, from_state, to_state)
+        except DatabaseError as exc:
+            warnings.warn(f'Could not drop extension {self.name} ({exc}); leaving it installed.')
+
+
+class AddTrigramIndexConcurrently(AddIndexConcurrently):
+    """AddIndexConcurrently that skips the index when pg_trgm is not installed."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not OptionalTrigramExtension().extension_exists(schema_editor, 'pg_trgm'):
+            warnings.warn(f'Skipped index {self.index.name}. {MISSING_TRIGRAM_WARNING}')
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so a large users table stays writable
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_partition_user_sessions'),
+    ]
+
+    operations = [
+        OptionalTrigramExtension(),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(fields=['date_joined', 'id'], name='users_joined_id_idx'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='users_email_trgm_idx'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('full_name'), name='gin_trgm_ops'), name='users_full_name_trgm_idx'),
+        ),
+    ]
@@ -1,8 +1,13 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import connection, models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone as timezone_utils
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .roles import RoleChecksMixin, role_registry
+from .revocation import token_versions
+from .signals import users_changed
 
 
 class Role(models.Model):
@@ -51,7 +56,12 @@ class RolePermission(models.Model):
 
 
 class UserSession(models.Model):
-    """User session tracking model."""
+    """User session tracking model.
+    
+    The table is range-partitioned by ``created_at`` (migration 0004), so its
+    database primary key is ``(id, created_at)``. The model keeps ``id`` as
+    its primary key: ids are unique through the identity sequence.
+    """
     user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='sessions', db_column='user_id')
     ip_address = models.GenericIPAddressField(help_text='IP address of the connection')
     user_agent = models.TextField(help_text='Browser/Device details string')
@@ -73,6 +83,26 @@ class UserSession(models.Model):
         return f"Session for {self.user.email} from {self.ip_address}"
 
 
+class UserSessionDailyRollup(models.Model):
+    """Daily login counts kept after old user_sessions partitions are dropped."""
+    day = models.DateField(help_text='UTC day the sessions were created on')
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='session_rollups', db_column='user_id')
+    screen_size = models.CharField(max_length=20, blank=True)
+    timezone = models.CharField(max_length=50, blank=True)
+    language = models.CharField(max_length=10, blank=True)
+    login_count = models.PositiveIntegerField(default=0, help_text='Sessions created that day with these attributes')
+    
+    class Meta:
+        db_table = 'user_session_daily_rollups'
+        verbose_name = 'user session daily rollup'
+        verbose_name_plural = 'user session daily rollups'
+        unique_together = [['day', 'user', 'screen_size', 'timezone', 'language']]
+        ordering = ['-day']
+    
+    def __str__(self):
+        return f"{self.login_count} logins for user {self.user_id} on {self.day}"
+
+
 class UserManager(BaseUserManager):
     """Custom user manager."""
     
@@ -92,26 +122,69 @@ class UserManager(BaseUserManager):
         """Return only banned users."""
         return super().get_queryset().filter(account_status='banned')
     
-    def create_user(self, email, password=None, **extra_fields):
-        """Create and save a regular user."""
+    def create_user(self, email, password=None, password_hash=None, **extra_fields):
+        """Create and save a regular user.
+        
+        Pass ``password_hash`` instead of ``password`` when the password was
+        already hashed (see accounts/hashing.py).
+        """
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         
         # Set default role to 'user' if not provided
         if 'role' not in extra_fields:
-            user_role = Role.objects.filter(name='user').first()
+            user_role = role_registry.get_by_name('user')
             if user_role:
                 extra_fields['role'] = user_role
         
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
     
+    def change_roles(self, user_ids, role_name):
+        """Move users between the user and moderator roles in one UPDATE.
+        
+        Only promotions (user -> moderator) and demotions (moderator -> user)
+        are allowed. Returns ``{user_id: error or None}`` for every requested id.
+        """
+        source_name = self.model.ROLE_TRANSITIONS[role_name]
+        target_role_id = role_registry.role_id(role_name)
+        source_role_id = role_registry.role_id(source_name)
+        if not target_role_id or not source_role_id:
+            raise ValueError(f'Roles {source_name} and {role_name} must exist')
+        
+        results = {}
+        with transaction.atomic():
+            current_roles = dict(
+                self.get_queryset().filter(id__in=user_ids).select_for_update().values_list('id', 'role_id')
+            )
+            for user_id in user_ids:
+                if user_id not in current_roles:
+                    results[user_id] = 'User not found'
+                elif current_roles[user_id] != source_role_id:
+                    results[user_id] = 'User is not a regular user' if source_name == 'user' else f'User is not a {source_name}'
+                else:
+                    results[user_id] = None
+            
+            changed_ids = [user_id for user_id, error in results.items() if error is None]
+            if changed_ids:
+                # Same rule as User.save(): moderators are staff; demotion keeps is_staff
+                fields = {'role_id': target_role_id}
+                if role_name == 'moderator':
+                    fields['is_staff'] = True
+                self.get_queryset().filter(id__in=changed_ids).update(**fields)
+                token_versions.invalidate_many(changed_ids)
+                users_changed.send(sender=self.model, user_ids=changed_ids)
+        return results
+    
     def create_superuser(self, email, password=None, **extra_fields):
         """Create and save a superuser."""
-        admin_role = Role.objects.filter(name='administrator').first()
+        admin_role = role_registry.get_by_name('administrator')
         if not admin_role:
             raise ValueError('Administrator role does not exist. Run migrations and create_dummy_data first.')
         
@@ -123,7 +196,7 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(RoleChecksMixin, AbstractBaseUser, PermissionsMixin):
     """Custom User model with roles and account status."""
     
     class AccountStatus(models.TextChoices):
@@ -154,6 +227,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         help_text='To handle admin bans separate from login status'
     )
     is_staff = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(default=0, help_text='Embedded in issued JWTs; incrementing it revokes all of them')
+    login_count = models.PositiveIntegerField(default=0, help_text='Sessions opened so far; numbers each new UserSession')
     
     # Timestamps
     date_joined = models.DateTimeField(default=timezone_utils.now)
@@ -164,10 +239,27 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name', 'surname']
     
+    # Role changes allowed by UserManager.change_roles: {target role: required current role}
+    ROLE_TRANSITIONS = {'moderator': 'user', 'user': 'moderator'}
+    
+    # Fields only ever changed with atomic UPDATE statements; a full save()
+    # must not write back a stale in-memory value
+    COUNTER_FIELDS = ('token_version', 'login_count')
+    
+    # Fields shown with each of the user's tasks (user_info of task listings)
+    TASK_OWNER_FIELDS = ('email', 'full_name', 'role_id')
+    
     class Meta:
         db_table = 'users'
         verbose_name = 'user'
         verbose_name_plural = 'users'
+        indexes = [
+            # Keyset pagination key, see tasks.pagination.UserCursorPagination
+            models.Index(fields=['date_joined', 'id'], name='users_joined_id_idx'),
+            # Substring search (icontains) in the administrator user directory
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='users_email_trgm_idx'),
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='users_full_name_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
@@ -178,10 +270,36 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.full_name = f"{self.surname} {self.name} {self.patronym}".strip()
         
         # Set is_staff=True for moderators
-        if self.role and self.role.name == 'moderator':
+        if role_registry.role_name(self.role_id) == 'moderator':
             self.is_staff = True
         
+        # Leave counter fields out of full updates of existing rows
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred_fields
+            ]
+        
         super().save(*args, **kwargs)
+        self._loaded_owner_fields = self.get_task_owner_fields()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded task owner fields so saves can detect changes to them."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_owner_fields = instance.get_task_owner_fields()
+        return instance
+    
+    def get_task_owner_fields(self):
+        """Return the loaded values of TASK_OWNER_FIELDS (None for deferred ones)."""
+        return tuple(self.__dict__.get(field) for field in self.TASK_OWNER_FIELDS)
+    
+    def task_owner_fields_changed(self):
+        """Return whether a field shown with the user's tasks differs from the loaded row."""
+        return self.get_task_owner_fields() != getattr(self, '_loaded_owner_fields', None)
     
     def get_full_name(self):
         """Return the full name."""
@@ -190,31 +308,29 @@ class User(AbstractBaseUser, PermissionsMixin):
         return f"{self.surname} {self.name} {self.patronym}".strip()
     
     def soft_delete(self):
-        """Soft delete the user."""
+        """Soft delete the user and revoke all their tokens."""
         self.account_status = self.AccountStatus.DELETED
         self.is_active = False
         self.save()
+        self.revoke_tokens()
     
     def ban(self):
-        """Ban the user."""
+        """Ban the user and revoke all their tokens."""
         self.account_status = self.AccountStatus.BANNED
         self.is_active = False
         self.save()
-    
-    def is_administrator(self):
-        """Check if user is administrator."""
-        return self.role and self.role.name == 'administrator'
-    
-    def is_moderator(self):
-        """Check if user is moderator."""
-        return self.role and self.role.name == 'moderator'
-    
-    def is_user(self):
-        """Check if user has user role."""
-        return self.role and self.role.name == 'user'
-    
-    def has_permission(self, permission_codename):
-        """Check if user has a specific permission via their role."""
-        if not self.role:
-            return False
-        return self.role.role_permissions.filter(permission__codename=permission_codename).exists()
+        self.revoke_tokens()
+    
+    def revoke_tokens(self):
+        """Invalidate every JWT issued to the user so far."""
+        self.token_version = token_versions.bump(self.pk)
+    
+    def next_connection_number(self):
+        """Count a new session for the user in one statement and return its number."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE users SET login_count = login_count + 1 WHERE id = %s RETURNING login_count',
+                [self.pk]
+            )
+            self.login_count = cursor.fetchone()[0]
+        return self.login_count
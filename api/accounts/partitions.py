@@ -0,0 +1,141 @@
+"""
+Monthly partitions of user_sessions.
+
+user_sessions is range-partitioned by created_at (migration 0004): one
+partition per UTC month named ``user_sessions_pYYYY_MM``, plus
+``user_sessions_default`` for rows outside every monthly partition.
+``ensure_partitions`` creates upcoming months ahead of time. Past the
+retention period, ``retire_partition`` rolls a month up into
+user_session_daily_rollups and then drops (or detaches) the whole
+partition, so expiring old sessions never deletes row by row.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+PARENT_TABLE = 'user_sessions'
+DEFAULT_PARTITION = 'user_sessions_default'
+_PARTITION_NAME = re.compile(r'^user_sessions_p(\d{4})_(\d{2})$')
+
+ROLLUP_SQL = """
+    INSERT INTO user_session_daily_rollups (day, user_id, screen_size, timezone, language, login_count)
+    SELECT (created_at AT TIME ZONE 'UTC')::date, user_id, screen_size, timezone, language, COUNT(*)
+    FROM {source}
+    {where}
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (day, user_id, screen_size, timezone, language)
+    DO UPDATE SET login_count = user_session_daily_rollups.login_count + EXCLUDED.login_count
+"""
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month():
+    now = datetime.now(dt_timezone.utc)
+    return date(now.year, now.month, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month:%Y_%m}'
+
+
+def month_bounds(month):
+    """Return the (inclusive, exclusive) UTC timestamps covered by ``month``."""
+    lower = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+    return lower, upper
+
+
+def list_partitions():
+    """Return the months of the monthly partitions attached to user_sessions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [PARENT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """Create and attach the partition for ``month``; return the rows moved into it.
+
+    Rows of that month already in the default partition are moved over first,
+    since a partition cannot be attached while the default one holds rows in
+    its range.
+    """
+    name = connection.ops.quote_name(partition_name(month))
+    lower, upper = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= %s AND created_at < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [lower, upper]
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper]
+        )
+    return moved
+
+
+def ensure_partitions(months_ahead):
+    """Create missing partitions from the current month to ``months_ahead`` months ahead."""
+    existing = set(list_partitions())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current_month(), offset)
+        if month not in existing:
+            create_partition(month)
+            created.append(month)
+    return created
+
+
+def retire_partition(month, detach=False):
+    """Roll ``month`` up into daily aggregates, then drop or detach its partition.
+
+    Returns the number of sessions rolled up. A detached partition stays
+    as a standalone table for archiving.
+    """
+    name = connection.ops.quote_name(partition_name(month))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {name}')
+        sessions = cursor.fetchone()[0]
+        cursor.execute(ROLLUP_SQL.format(source=name, where=''))
+        if detach:
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}')
+        else:
+            cursor.execute(f'DROP TABLE {name}')
+    return sessions
+
+
+def retire_default_rows(before):
+    """Roll up and delete default-partition sessions created before ``before``; return how many."""
+    where = 'WHERE created_at < %s'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(ROLLUP_SQL.format(source=DEFAULT_PARTITION, where=where), [before])
+        cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} {where}', [before])
+        return cursor.rowcount
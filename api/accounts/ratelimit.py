@@ -0,0 +1,251 @@
+"""
+Sliding-window limiter for login attempts.
+
+Every login attempt costs a bcrypt verification, so attempts are counted per
+client IP (see accounts.views.get_client_ip) and per email and rejected once
+either exceeds its budget within ``LOGIN_RATE_LIMIT_WINDOW`` seconds, before
+the user lookup or any hashing.
+The backend is pluggable (``LOGIN_RATE_LIMIT_BACKEND``):
+
+* ``memory`` keeps exact per-process sliding logs of attempt timestamps.
+* ``cache`` keeps approximate sliding-window counters (current and previous
+  fixed window, weighted by overlap) in a Django cache, so a shared backend
+  (database, Redis, memcached) enforces one budget across processes.
+"""
+import hashlib
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LoginRateLimited(Exception):
+    """Raised when a login attempt is over budget."""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f'Too many login attempts for this {scope}')
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class MemoryBackend:
+    """Exact sliding logs of attempt timestamps, local to this process."""
+    blocking = False
+    max_keys = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs = {}
+
+    def _log(self, key, window, now):
+        log = self._logs.get(key)
+        if log is not None:
+            while log and log[0] <= now - window:
+                log.popleft()
+        return log
+
+    def count(self, key, window):
+        with self._lock:
+            log = self._log(key, window, time.time())
+            return len(log) if log else 0
+
+    def acquire(self, key, window, limit):
+        """Record an attempt if fewer than ``limit`` are in the window; return a release token or None."""
+        now = time.time()
+        with self._lock:
+            log = self._log(key, window, now)
+            if log is not None and len(log) >= limit:
+                return None
+            if log is None:
+                if len(self._logs) >= self.max_keys:
+                    self._sweep(window, now)
+                log = self._logs[key] = deque()
+            log.append(now)
+        return key, now
+
+    def release(self, token):
+        """Take back an attempt recorded by acquire()."""
+        key, attempted_at = token
+        with self._lock:
+            log = self._logs.get(key)
+            if log and attempted_at in log:
+                log.remove(attempted_at)
+
+    def retry_after(self, key, window, limit):
+        with self._lock:
+            now = time.time()
+            log = self._log(key, window, now)
+            if not log or len(log) < limit:
+                return 0
+            # The attempt that has to expire for the count to drop below the limit
+            return log[len(log) - limit] + window - now
+
+    def reset(self, key, window):
+        with self._lock:
+            self._logs.pop(key, None)
+
+    def _sweep(self, window, now):
+        """Drop expired logs, then the oldest keys if still over ``max_keys``."""
+        for key in list(self._logs):
+            if not self._log(key, window, now):
+                del self._logs[key]
+        for key in list(self._logs)[:len(self._logs) - self.max_keys + 1]:
+            del self._logs[key]
+
+
+class CacheBackend:
+    """Approximate sliding-window counters stored in a Django cache."""
+    blocking = True
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _keys(self, key, window, now):
+        current = int(now // window)
+        return f'{key}:{current}', f'{key}:{current - 1}'
+
+    def count(self, key, window):
+        now = time.time()
+        current_key, previous_key = self._keys(key, window, now)
+        counts = self.cache.get_many([current_key, previous_key])
+        # The previous window still overlaps the sliding window by this fraction
+        overlap = 1 - (now % window) / window
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * overlap
+
+    def acquire(self, key, window, limit):
+        """Record an attempt if the window stays within ``limit``; return a release token or None.
+
+        The attempt is counted first (add() only creates a missing counter
+        and incr() is atomic) and taken back if the count including it is
+        over the limit, so concurrent attempts in any process cannot all
+        pass a check made before any of them was counted.
+        """
+        now = time.time()
+        current_key, previous_key = self._keys(key, window, now)
+        current = 1
+        while not self.cache.add(current_key, 1, 2 * window):
+            try:
+                current = self.cache.incr(current_key)
+                break
+            except ValueError:
+                # Expired between add() and incr(); create it again
+                continue
+        overlap = 1 - (now % window) / window
+        if current + self.cache.get(previous_key, 0) * overlap > limit:
+            self.release(current_key)
+            return None
+        return current_key
+
+    def release(self, token):
+        """Take back an attempt recorded by acquire()."""
+        try:
+            self.cache.decr(token)
+        except ValueError:
+            pass
+
+    def retry_after(self, key, window, limit):
+        # Upper bound: by the end of the next window only new attempts count
+        now = time.time()
+        return window - now % window + (window if self.count(key, window) >= limit else 0)
+
+    def reset(self, key, window):
+        self.cache.delete_many(self._keys(key, window, time.time()))
+
+
+class LoginRateLimiter:
+    """Per-IP and per-email attempt budgets over a sliding window."""
+    key_prefix = 'accounts:login_attempts'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backend = None
+        self._counters = {'allowed': 0, 'rejected_ip': 0, 'rejected_email': 0}
+
+    @property
+    def window(self):
+        return getattr(settings, 'LOGIN_RATE_LIMIT_WINDOW', 300)
+
+    @property
+    def limits(self):
+        """Return ``{scope: max attempts}``; 0 disables a scope."""
+        return {
+            'ip': getattr(settings, 'LOGIN_RATE_LIMIT_PER_IP', 50),
+            'email': getattr(settings, 'LOGIN_RATE_LIMIT_PER_EMAIL', 10),
+        }
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    name = getattr(settings, 'LOGIN_RATE_LIMIT_BACKEND', 'memory')
+                    if name == 'cache':
+                        alias = getattr(settings, 'LOGIN_RATE_LIMIT_CACHE_ALIAS', 'default')
+                        self._backend = CacheBackend(caches[alias])
+                    else:
+                        self._backend = MemoryBackend()
+        return self._backend
+
+    def key(self, scope, value):
+        digest = hashlib.sha1(str(value).encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{scope}:{digest}'
+
+    def _scoped_keys(self, ip, email):
+        values = {'ip': ip, 'email': (email or '').strip().lower()}
+        return [
+            (scope, self.key(scope, values[scope]), limit)
+            for scope, limit in self.limits.items()
+            if limit and values[scope]
+        ]
+
+    def hit(self, ip, email):
+        """Count a login attempt, or raise LoginRateLimited if it is over budget.
+
+        A rejected attempt counts against no budget: the scopes it was
+        already counted in are released.
+        """
+        backend, window = self.backend, self.window
+        tokens = []
+        for scope, key, limit in self._scoped_keys(ip, email):
+            token = backend.acquire(key, window, limit)
+            if token is None:
+                for acquired in tokens:
+                    backend.release(acquired)
+                with self._lock:
+                    self._counters[f'rejected_{scope}'] += 1
+                raise LoginRateLimited(scope, backend.retry_after(key, window, limit))
+            tokens.append(token)
+        with self._lock:
+            self._counters['allowed'] += 1
+
+    def reset_email(self, email):
+        """Forget the attempts against ``email`` (after a successful login)."""
+        if email:
+            self.backend.reset(self.key('email', email.strip().lower()), self.window)
+
+    async def ahit(self, ip, email):
+        if self.backend.blocking:
+            return await sync_to_async(self.hit)(ip, email)
+        return self.hit(ip, email)
+
+    async def areset_email(self, email):
+        if self.backend.blocking:
+            return await sync_to_async(self.reset_email)(email)
+        return self.reset_email(email)
+
+    def stats(self):
+        """Return attempt and rejection counters of this process."""
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'backend': type(self.backend).__name__,
+            'window': self.window,
+            **{f'max_per_{scope}': limit for scope, limit in self.limits.items()},
+            **counters,
+        }
+
+
+login_limiter = LoginRateLimiter()
@@ -0,0 +1,27 @@
+"""
+Signal receivers keeping account caches (role registry, auth state) in sync.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Permission, Role, RolePermission, User
+from .revocation import token_versions
+from .roles import role_registry
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidate_role_registry(sender, **kwargs):
+    """Reload roles and permissions after any change to them."""
+    role_registry.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_state(sender, instance, **kwargs):
+    """Drop the cached authentication state of a saved or deleted user."""
+    token_versions.invalidate(instance.pk)
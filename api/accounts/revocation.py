@@ -0,0 +1,84 @@
+"""
+Per-user token version used to revoke JWTs without a blacklist.
+
+Every issued token carries the user's ``token_version`` (the ``ver`` claim).
+Bumping the version in the users table revokes all of the user's tokens at
+once; validators compare the claim against the cached current version, so
+checking a token costs no blacklist lookup. The cache alias is
+``TOKEN_VERSION_CACHE_ALIAS``; it must be shared between processes for a
+revocation to take effect everywhere before ``TOKEN_VERSION_CACHE_TIMEOUT``.
+
+The cached entry also holds the few columns claims-only authentication needs
+(role, account status, is_active); a receiver drops it whenever a User is saved.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+
+class TokenVersionCache:
+    """Cached view of users.token_version and the user's authentication state."""
+    key_prefix = 'accounts:auth_state'
+    state_columns = ('token_version', 'role_id', 'account_status', 'is_active')
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'TOKEN_VERSION_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TOKEN_VERSION_CACHE_TIMEOUT', 30)
+
+    def key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    def get_state(self, user_id):
+        """Return a dict of the user's ``state_columns``, or None if the user does not exist."""
+        state = self.cache.get(self.key(user_id))
+        if state is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {', '.join(self.state_columns)} FROM users WHERE id = %s",
+                    [user_id]
+                )
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            state = dict(zip(self.state_columns, row))
+            self.cache.set(self.key(user_id), state, self.timeout)
+        return state
+
+    def get(self, user_id):
+        """Return the current token version of the user, or None if the user does not exist."""
+        state = self.get_state(user_id)
+        return state['token_version'] if state else None
+
+    def invalidate(self, user_id):
+        """Drop the cached state now and again once the current transaction commits."""
+        self.cache.delete(self.key(user_id))
+        transaction.on_commit(lambda: self.cache.delete(self.key(user_id)))
+
+    def invalidate_many(self, user_ids):
+        """Like invalidate, for many users at once (e.g. after a bulk UPDATE)."""
+        keys = [self.key(user_id) for user_id in user_ids]
+        if keys:
+            self.cache.delete_many(keys)
+            transaction.on_commit(lambda: self.cache.delete_many(keys))
+
+    def bump(self, user_id):
+        """Increment the user's token version in one statement and return it."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE users SET token_version = token_version + 1 WHERE id = %s RETURNING token_version',
+                [user_id]
+            )
+            version = cursor.fetchone()[0]
+        self.invalidate(user_id)
+        return version
+
+    def is_current(self, user_id, token_version):
+        """Check whether a token carrying ``token_version`` is still valid."""
+        return token_version == self.get(user_id)
+
+
+token_versions = TokenVersionCache()
@@ -0,0 +1,153 @@
+"""
+Process-wide registry of roles and their permissions.
+
+Roles and role permissions change rarely but are checked on almost every
+request. The registry loads them once (two queries) and answers role and
+permission checks from memory. Signal receivers invalidate it when a Role,
+Permission or RolePermission changes; with ``ROLE_REGISTRY_VERSION_CACHE``
+set to a shared cache alias, other processes notice the change through a
+version stamp checked at most every ``ROLE_REGISTRY_VERSION_CHECK_INTERVAL``
+seconds.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+
+class RoleRegistry:
+    """In-memory snapshot of roles and the permission codenames they grant."""
+    version_key = 'accounts:role_registry_version'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._version = None
+        self._checked_at = 0.0
+        # Set while this thread's transaction has changed roles; what it
+        # reads then may be rolled back, so it is not cached
+        self._local = threading.local()
+
+    @property
+    def version_cache(self):
+        alias = getattr(settings, 'ROLE_REGISTRY_VERSION_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _load(self):
+        from .models import Role, RolePermission
+
+        roles = {role.id: role for role in Role.objects.all()}
+        permissions = {role_id: set() for role_id in roles}
+        for role_id, codename in RolePermission.objects.values_list('role_id', 'permission__codename'):
+            permissions.setdefault(role_id, set()).add(codename)
+        return {
+            'roles': roles,
+            'by_name': {role.name: role for role in roles.values()},
+            'permissions': {role_id: frozenset(codenames) for role_id, codenames in permissions.items()},
+        }
+
+    def _shared_version(self):
+        cache = self.version_cache
+        if cache is None:
+            return None
+        version = cache.get(self.version_key)
+        if version is None:
+            # First process to look: publish a stamp (add() keeps a concurrent winner)
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def _get_state(self):
+        state = self._state
+        if state is not None and self.version_cache is not None:
+            interval = getattr(settings, 'ROLE_REGISTRY_VERSION_CHECK_INTERVAL', 5)
+            if time.monotonic() - self._checked_at >= interval:
+                self._checked_at = time.monotonic()
+                if self._shared_version() != self._version:
+                    state = None
+        if state is None:
+            if getattr(self._local, 'uncommitted', False):
+                if connection.in_atomic_block:
+                    return self._load()
+                self._local.uncommitted = False
+            with self._lock:
+                version = self._shared_version()
+                state = self._load()
+                self._state, self._version = state, version
+                self._checked_at = time.monotonic()
+        return state
+
+    def invalidate(self):
+        """Drop the snapshot now and again once the current transaction commits.
+
+        A reload between the two (by another request, or by this transaction
+        before it commits) may cache data that is stale once the commit lands;
+        the second drop, with the version bump for other processes, discards it.
+        """
+        self._state = None
+        if connection.in_atomic_block:
+            self._local.uncommitted = True
+        transaction.on_commit(self._invalidate_committed)
+
+    def _invalidate_committed(self):
+        self._local.uncommitted = False
+        self._state = None
+        cache = self.version_cache
+        if cache is not None:
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def get(self, role_id):
+        """Return the Role with the given id, or None."""
+        if role_id is None:
+            return None
+        return self._get_state()['roles'].get(role_id)
+
+    def get_by_name(self, name):
+        """Return the Role with the given name, or None."""
+        return self._get_state()['by_name'].get(name)
+
+    def role_id(self, name):
+        """Return the id of the role with the given name, or None."""
+        role = self.get_by_name(name)
+        return role.id if role else None
+
+    def role_name(self, role_id):
+        """Return the name of the role with the given id, or None."""
+        role = self.get(role_id)
+        return role.name if role else None
+
+    def permissions(self, role_id):
+        """Return the permission codenames granted to the role."""
+        if role_id is None:
+            return frozenset()
+        return self._get_state()['permissions'].get(role_id, frozenset())
+
+    def has_permission(self, role_id, permission_codename):
+        """Check whether the role grants the permission."""
+        return permission_codename in self.permissions(role_id)
+
+
+role_registry = RoleRegistry()
+
+
+class RoleChecksMixin:
+    """Role and permission checks for objects carrying a ``role_id``."""
+    
+    def is_administrator(self):
+        """Check if user is administrator."""
+        return role_registry.role_name(self.role_id) == 'administrator'
+    
+    def is_moderator(self):
+        """Check if user is moderator."""
+        return role_registry.role_name(self.role_id) == 'moderator'
+    
+    def is_user(self):
+        """Check if user has user role."""
+        return role_registry.role_name(self.role_id) == 'user'
+    
+    def has_permission(self, permission_codename):
+        """Check if user has a specific permission via their role."""
+        return role_registry.has_permission(self.role_id, permission_codename)
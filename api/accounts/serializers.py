@@ -1,10 +1,10 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.conf import settings
-import yaml
-from pathlib import Path
+from taskboard.config import config
+from .hashing import password_hashers
 from .models import User, Role, Permission, UserSession
+from .roles import role_registry
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -59,17 +59,24 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return value
     
     def create(self, validated_data):
-        """Create a new user."""
+        """Create a new user.
+        
+        ``password_hash`` may be passed to save() when the caller already
+        hashed the password; otherwise it is hashed on the hashing pool.
+        """
         validated_data.pop('password_repeat')
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash is None:
+            password_hash = password_hashers.make_password(validated_data['password'])
         
         # Get default 'user' role
-        user_role = Role.objects.filter(name='user').first()
+        user_role = role_registry.get_by_name('user')
         if not user_role:
             raise serializers.ValidationError("Default 'user' role does not exist. Please run migrations and create_dummy_data.")
         
         user = User.objects.create_user(
             email=validated_data['email'],
-            password=validated_data['password'],
+            password_hash=password_hash,
             name=validated_data['name'],
             surname=validated_data['surname'],
             patronym=validated_data.get('patronym', ''),
@@ -95,17 +102,9 @@ class UserLoginSerializer(serializers.Serializer):
         if not email or not password:
             raise serializers.ValidationError({"error": "Must include 'email' and 'password'."})
         
-        # Check for admin login
-        BASE_DIR = Path(__file__).resolve().parent.parent.parent
-        SETTINGS_YAML_PATH = BASE_DIR / 'settings.yaml'
-        try:
-            with open(SETTINGS_YAML_PATH, 'r') as f:
-                config = yaml.safe_load(f)
-            admin_password = config.get('admin', {}).get('password', '')
-            admin_email = 'admin@taskboard.local'
-        except Exception:
-            admin_password = ''
-            admin_email = 'admin@taskboard.local'
+        # Check for admin login (settings.yaml is cached by taskboard.config)
+        admin_password = config.get_str('admin', 'password', '')
+        admin_email = 'admin@taskboard.local'
         
         # Try admin login first
         if email == admin_email and password == admin_password:
@@ -114,16 +113,16 @@ class UserLoginSerializer(serializers.Serializer):
                 admin_user = User.objects.all_with_deleted().get(email=admin_email)
                 if admin_user.account_status == 'active':
                     attrs['user'] = admin_user
+                    attrs['password_checked'] = True
                     return attrs
                 else:
                     raise serializers.ValidationError({"error": "This account is not active."})
             except User.DoesNotExist:
                 raise serializers.ValidationError({"error": "Admin account does not exist. Please run 'python manage.py create_dummy_data' to create it."})
         
-        # Regular user authentication
-        try:
-            user = User.objects.all_with_deleted().get(email=email)
-            
+        # Regular user authentication: one lookup and exactly one password hash
+        user = User.objects.all_with_deleted().filter(email=email).first()
+        if user is not None:
             # Check account status first
             if user.account_status == 'deleted':
                 raise serializers.ValidationError({"error": "This account has been deleted."})
@@ -131,30 +130,20 @@ class UserLoginSerializer(serializers.Serializer):
                 raise serializers.ValidationError({"error": "This account has been banned."})
             if user.account_status != 'active':
                 raise serializers.ValidationError({"error": "This account is not active."})
-            
-            # Try Django's authenticate first
-            authenticated_user = authenticate(request=self.context.get('request'), username=email, password=password)
-            
-            # If authenticate fails, try manual password check
-            # This handles cases where is_active might be False but account_status is active
-            if not authenticated_user:
-                # Check password manually
-                if user.check_password(password):
-                    # Password is correct, use this user
-                    authenticated_user = user
-                else:
-                    # Password is incorrect
-                    raise serializers.ValidationError({"error": "Invalid email or password."})
-            
-            # Ensure we're using the authenticated user
-            if authenticated_user.account_status != 'active':
-                raise serializers.ValidationError({"error": "This account is not active."})
-            
-            attrs['user'] = authenticated_user
+        
+        # Async callers check the password themselves on the hashing pool;
+        # an unknown email still costs them one (dummy) hash
+        if self.context.get('defer_password_check'):
+            attrs['user'] = user
+            attrs['password_checked'] = False
             return attrs
-            
-        except User.DoesNotExist:
+        
+        if not password_hashers.check_user_password(user, password):
             raise serializers.ValidationError({"error": "Invalid email or password."})
+        
+        attrs['user'] = user
+        attrs['password_checked'] = True
+        return attrs
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -187,6 +176,20 @@ class UserSerializer(serializers.ModelSerializer):
                            'role_name', 'is_active', 'account_status', 'date_joined')
 
 
+class BulkRoleChangeSerializer(serializers.Serializer):
+    """Serializer for changing the role of many users at once."""
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=5000
+    )
+    role = serializers.ChoiceField(choices=sorted(User.ROLE_TRANSITIONS))
+    
+    def validate_user_ids(self, value):
+        """Drop duplicate ids, keeping the request order."""
+        return list(dict.fromkeys(value))
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     """Serializer for password change."""
     old_password = serializers.CharField(required=True, write_only=True)
@@ -0,0 +1,8 @@
+"""
+Custom account signals.
+"""
+from django.dispatch import Signal
+
+# Sent after bulk writes of user rows that bypass Model.save() (bulk role
+# changes). Arguments: ``user_ids`` - the changed users.
+users_changed = Signal()
@@ -0,0 +1,180 @@
+import threading
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.request import Request
+
+from tasks.views import UserListView
+from .models import Role, User, UserSession
+from .ratelimit import CacheBackend, LoginRateLimited, LoginRateLimiter, MemoryBackend
+from .views import complete_login, get_client_ip
+
+
+class UserDirectorySearchTests(TestCase):
+    """The administrator user directory search and its trigram indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='user')
+        for index, (name, surname) in enumerate([('Anna', 'Karenina'), ('Ivan', 'Petrov'), ('Joanna', 'Smith')]):
+            User.objects.create_user(f'person{index}@example.com', 'secret-password', name=name, surname=surname, role=role)
+
+    def search_queryset(self, search):
+        """Return the user directory queryset for ``?search=`` as UserListView builds it."""
+        view = UserListView()
+        view.request = Request(RequestFactory().get('/api/users/', {'search': search}))
+        return view.get_queryset()
+
+    def test_search_matches_email_and_full_name_substrings(self):
+        self.assertEqual(
+            sorted(self.search_queryset('ANNA').values_list('name', flat=True)),
+            ['Anna', 'Joanna']
+        )
+        self.assertEqual(list(self.search_queryset('son1@').values_list('name', flat=True)), ['Ivan'])
+
+    def test_search_uses_trigram_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('pg_trgm is not installed; migration 0005 skipped the trigram indexes')
+            # A three-row table is cheaper to scan; check the index is usable at all
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = self.search_queryset('anna').explain()
+        # UPPER(col) LIKE UPPER('%anna%') matches the UPPER(col) index expressions
+        self.assertIn('users_email_trgm_idx', plan)
+        self.assertIn('users_full_name_trgm_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+
+class ConcurrentLoginTests(TransactionTestCase):
+    """Simultaneous logins of one user get distinct connection numbers."""
+    logins = 8
+
+    def test_concurrent_logins_get_unique_consecutive_numbers(self):
+        role = Role.objects.create(name='user')
+        user = User.objects.create_user('racer@example.com', 'secret-password', name='Race', surname='Condition', role=role)
+        barrier = threading.Barrier(self.logins)
+        numbers, errors = [], []
+
+        def login():
+            # Every thread logs in with its own User instance and connection
+            try:
+                request = RequestFactory().post('/api/accounts/login/')
+                thread_user = User.objects.get(pk=user.pk)
+                barrier.wait()
+                complete_login(request, thread_user, {})
+                numbers.append(thread_user.login_count)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=login) for _ in range(self.logins)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(numbers), list(range(1, self.logins + 1)))
+        self.assertEqual(
+            sorted(UserSession.objects.filter(user=user).values_list('connection_number', flat=True)),
+            list(range(1, self.logins + 1))
+        )
+        user.refresh_from_db()
+        self.assertEqual(user.login_count, self.logins)
+
+
+class ClientIpTests(SimpleTestCase):
+    """X-Forwarded-For is only trusted for the configured number of proxies."""
+
+    def get_ip(self, forwarded_for=None):
+        headers = {'REMOTE_ADDR': '10.0.0.2'}
+        if forwarded_for:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return get_client_ip(RequestFactory().post('/api/accounts/login/', **headers))
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(self.get_ip('1.2.3.4'), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_spoofed_entries_before_the_trusted_proxy_are_ignored(self):
+        # The proxy appended the address it saw after the client's own entry
+        self.assertEqual(self.get_ip('6.6.6.6, 203.0.113.7'), '203.0.113.7')
+        self.assertEqual(self.get_ip(), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_short_chains_fall_back_to_the_first_address(self):
+        self.assertEqual(self.get_ip('203.0.113.7'), '203.0.113.7')
+
+
+@override_settings(LOGIN_RATE_LIMIT_PER_IP=5, LOGIN_RATE_LIMIT_PER_EMAIL=3, LOGIN_RATE_LIMIT_WINDOW=300)
+class LoginRateLimiterTests(SimpleTestCase):
+    """Attempt budgets hold under concurrent attempts."""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def limiter(self, backend):
+        limiter = LoginRateLimiter()
+        limiter._backend = backend
+        return limiter
+
+    def concurrent_hits(self, limiter, attempts, email):
+        barrier = threading.Barrier(attempts)
+        allowed = []
+
+        def attempt():
+            barrier.wait()
+            try:
+                limiter.hit('203.0.113.7', email)
+                allowed.append(True)
+            except LoginRateLimited:
+                pass
+
+        threads = [threading.Thread(target=attempt) for _ in range(attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(allowed)
+
+    def test_concurrent_attempts_stay_within_the_budget(self):
+        for backend in (MemoryBackend(), CacheBackend(caches['default'])):
+            with self.subTest(type(backend).__name__):
+                caches['default'].clear()
+                self.assertEqual(self.concurrent_hits(self.limiter(backend), 20, 'victim@example.com'), 3)
+
+    def test_rejected_attempts_do_not_use_up_other_budgets(self):
+        for backend in (MemoryBackend(), CacheBackend(caches['default'])):
+            with self.subTest(type(backend).__name__):
+                caches['default'].clear()
+                limiter = self.limiter(backend)
+                for _ in range(3):
+                    limiter.hit('203.0.113.7', 'victim@example.com')
+                with self.assertRaises(LoginRateLimited):
+                    limiter.hit('203.0.113.7', 'victim@example.com')
+                # Only the three allowed attempts count against the IP budget
+                limiter.hit('203.0.113.7', 'other@example.com')
+                limiter.hit('203.0.113.7', 'third@example.com')
+                with self.assertRaises(LoginRateLimited) as raised:
+                    limiter.hit('203.0.113.7', 'fourth@example.com')
+                self.assertEqual(raised.exception.scope, 'ip')
+
+
+class AuthSchemaTests(SimpleTestCase):
+    """The async register and login views are in the OpenAPI schema."""
+
+    def test_register_and_login_are_documented(self):
+        paths = SchemaGenerator().get_schema(public=True)['paths']
+        for path, success in (('/api/accounts/register/', '201'), ('/api/accounts/login/', '200')):
+            with self.subTest(path):
+                operation = paths[path]['post']
+                self.assertEqual(list(operation['requestBody']['content']), ['application/json'])
+                self.assertEqual(
+                    operation['responses'][success]['content']['application/json']['schema']['$ref'],
+                    '#/components/schemas/LoginResponse'
+                )
@@ -0,0 +1,93 @@
+"""
+JWT helpers tying issued tokens to UserSession records.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claim carrying the UserSession primary key; access tokens copy it from
+# the refresh token they are derived from
+SESSION_ID_CLAIM = 'sid'
+
+# Claim carrying User.token_version at issue time (see accounts/revocation.py)
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def create_session_tokens(user, session_id=None):
+    """Return a RefreshToken for ``user`` bound to a session and the current token version."""
+    refresh = RefreshToken.for_user(user)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    if session_id is not None:
+        refresh[SESSION_ID_CLAIM] = session_id
+    return refresh
+
+
+class IssuedTokens:
+    """An encoded access/refresh token pair with its expiries, minted in one pass.
+    
+    Expiries come from the token objects' ``exp`` claims, so building the
+    response body and the cookies never decodes the encoded tokens again.
+    """
+    
+    def __init__(self, refresh):
+        access = refresh.access_token
+        self.access_token = str(access)
+        self.refresh_token = str(refresh)
+        self.access_expires_at = datetime.fromtimestamp(access['exp'], tz=dt_timezone.utc)
+        self.refresh_expires_at = datetime.fromtimestamp(refresh['exp'], tz=dt_timezone.utc)
+        # Ensure UTC format: YYYY-MM-DDTHH:MM:SS+00:00
+        self.expires_at = self.access_expires_at.isoformat()
+    
+    def as_dict(self):
+        """Return the token fields of login/refresh response bodies."""
+        return {
+            'access_token': self.access_token,
+            'refresh_token': self.refresh_token,
+            'expires_at': self.expires_at,
+        }
+    
+    def cookie_specs(self):
+        """Return (name, value, max_age) of the cookies carrying these tokens."""
+        now = time.time()
+        access_max_age = max(int(self.access_expires_at.timestamp() - now), 0)
+        refresh_max_age = max(int(self.refresh_expires_at.timestamp() - now), 0)
+        return [
+            # Token value only, not "Bearer {token}"
+            (getattr(settings, 'JWT_COOKIE_NAME', 'access_token'), self.access_token, access_max_age),
+            ('access_token_expires_at', self.expires_at, access_max_age),
+            ('refresh_token', self.refresh_token, refresh_max_age),
+        ]
+    
+    def set_cookies(self, response):
+        """Set the token cookies on ``response``."""
+        options = {
+            'httponly': getattr(settings, 'JWT_COOKIE_HTTPONLY', True),
+            'secure': getattr(settings, 'JWT_COOKIE_SECURE', False),
+            'samesite': getattr(settings, 'JWT_COOKIE_SAMESITE', 'Lax'),
+            'path': '/',
+        }
+        for name, value, max_age in self.cookie_specs():
+            response.set_cookie(name, value, max_age=max_age, **options)
+        return response
+
+
+def issue_session_tokens(user, session_id=None):
+    """Mint tokens for ``user`` bound to a session; see create_session_tokens."""
+    return IssuedTokens(create_session_tokens(user, session_id))
+
+
+def get_token_session_id(token):
+    """Return the session id carried by a validated token, or None."""
+    if token is None:
+        return None
+    try:
+        return token.get(SESSION_ID_CLAIM)
+    except AttributeError:
+        return None
+
+
+def get_token_version(token):
+    """Return the token version carried by a validated token (0 for older tokens)."""
+    return token.get(TOKEN_VERSION_CLAIM, 0)
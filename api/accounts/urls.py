@@ -1,22 +1,30 @@
 from django.urls import path
 from .views import (
     RegisterView,
-    login_view,
+    LoginView,
     logout_view,
+    logout_all_view,
     refresh_token_view,
     ProfileView,
     delete_account_view,
     change_password_view,
     change_email_view,
+    session_list_view,
+    revoke_session_view,
+    login_metrics_view,
 )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', login_view, name='login'),
+    path('login/', LoginView.as_view(), name='login'),
     path('logout/', logout_view, name='logout'),
+    path('logout-all/', logout_all_view, name='logout_all'),
     path('token/refresh/', refresh_token_view, name='refresh_token'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('delete/', delete_account_view, name='delete_account'),
     path('change-password/', change_password_view, name='change_password'),
     path('change-email/', change_email_view, name='change_email'),
+    path('sessions/', session_list_view, name='session_list'),
+    path('sessions/<int:session_id>/', revoke_session_view, name='revoke_session'),
+    path('metrics/', login_metrics_view, name='login_metrics'),
 ]
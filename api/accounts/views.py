@@ -1,205 +1,132 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 from django.utils import timezone
 from django.conf import settings
-from datetime import timedelta
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.views import View
+from tasks.permissions import IsAdministrator
+from .hashing import HashPoolBusy, password_hashers
+from .ratelimit import LoginRateLimited, login_limiter
 from .models import User, UserSession
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     UserProfileSerializer,
+    UserSessionSerializer,
     ChangePasswordSerializer,
     ChangeEmailSerializer,
 )
+from .tokens import IssuedTokens, get_token_session_id, get_token_version, issue_session_tokens
+from .revocation import token_versions
 
 
 def get_client_ip(request):
-    """Extract client IP address from request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    """Extract client IP address from request.
+    
+    X-Forwarded-For is client controlled except for the entries appended by
+    our own proxies, so only ``TRUSTED_PROXY_COUNT`` hops are trusted: the
+    address that many entries from the right of the chain ending with
+    REMOTE_ADDR. Without trusted proxies the header is ignored.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    trusted_proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if trusted_proxies <= 0:
+        return remote_addr
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    chain = [ip.strip() for ip in x_forwarded_for.split(',') if ip.strip()] + [remote_addr]
+    return chain[max(len(chain) - 1 - trusted_proxies, 0)]
 
 
-def set_jwt_cookies(response, access_token, refresh_token):
-    """Set JWT tokens as HTTP-only cookies with expiration timestamp.
-    Returns expires_at timestamp for inclusion in response body."""
-    http_only = getattr(settings, 'JWT_COOKIE_HTTPONLY', True)
-    secure = getattr(settings, 'JWT_COOKIE_SECURE', False)
-    same_site = getattr(settings, 'JWT_COOKIE_SAMESITE', 'Lax')
+def clear_jwt_cookies(response):
+    """Clear JWT token cookies."""
     cookie_name = getattr(settings, 'JWT_COOKIE_NAME', 'access_token')
-    
-    # Clear existing cookies first to prevent duplicates
     response.delete_cookie(cookie_name, path='/')
     response.delete_cookie('access_token_expires_at', path='/')
     response.delete_cookie('refresh_token', path='/')
+    return response
+
+
+def reissue_session_tokens(request, user):
+    """Revoke all of ``user``'s tokens and sign in again only the current session.
     
-    # Decode JWT to get expiration time
-    try:
-        # Simple JWT tokens are base64 encoded, decode to get expiration
-        # Format: header.payload.signature
-        import base64
-        import json
-        
-        parts = access_token.split('.')
-        if len(parts) >= 2:
-            # Decode payload (second part)
-            payload = parts[1]
-            # Add padding if needed
-            payload += '=' * (4 - len(payload) % 4)
-            decoded_payload = base64.urlsafe_b64decode(payload)
-            token_data = json.loads(decoded_payload)
-            
-            exp_timestamp = token_data.get('exp')
-            if exp_timestamp:
-                # Convert to datetime and then to ISO format string in UTC
-                from datetime import datetime
-                exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-                # Ensure UTC format: YYYY-MM-DDTHH:MM:SS+00:00
-                expires_at = exp_datetime.isoformat()
-                # Calculate max_age in seconds (using UTC timestamps)
-                max_age = int(exp_timestamp - timezone.now().timestamp())
-            else:
-                # Fallback to default - use UTC explicitly
-                max_age = getattr(settings, 'JWT_COOKIE_MAX_AGE', 3600)
-                # Use UTC timezone explicitly
-                expires_at_dt = timezone.now().astimezone(timezone.utc) + timedelta(seconds=max_age)
-                expires_at = expires_at_dt.isoformat()
-        else:
-            # Fallback if token format is wrong - use UTC explicitly
-            max_age = getattr(settings, 'JWT_COOKIE_MAX_AGE', 3600)
-            expires_at_dt = timezone.now().astimezone(timezone.utc) + timedelta(seconds=max_age)
-            expires_at = expires_at_dt.isoformat()
-    except Exception:
-        # Fallback if decoding fails - use UTC explicitly
-        max_age = getattr(settings, 'JWT_COOKIE_MAX_AGE', 3600)
-        expires_at_dt = timezone.now().astimezone(timezone.utc) + timedelta(seconds=max_age)
-        expires_at = expires_at_dt.isoformat()
-    
-    # Set access_token cookie (token value only, not "Bearer {token}")
-    response.set_cookie(
-        cookie_name,
-        access_token,  # Store token value only
-        max_age=max_age,
-        httponly=http_only,
-        secure=secure,
-        samesite=same_site,
-        path='/'
-    )
-    
-    # Set expiration timestamp cookie
-    response.set_cookie(
-        'access_token_expires_at',
-        expires_at,
-        max_age=max_age,
-        httponly=http_only,
-        secure=secure,
-        samesite=same_site,
-        path='/'
-    )
+    Returns the IssuedTokens of the current session.
+    """
+    session_id = get_token_session_id(request.auth)
+    user.revoke_tokens()
     
-    # Calculate refresh token max_age
-    refresh_lifetime = getattr(settings, 'SIMPLE_JWT', {}).get('REFRESH_TOKEN_LIFETIME')
-    if refresh_lifetime and hasattr(refresh_lifetime, 'total_seconds'):
-        refresh_max_age = int(refresh_lifetime.total_seconds())
-    else:
-        refresh_max_age = 86400  # Default 24 hours
-    
-    response.set_cookie(
-        'refresh_token',
-        refresh_token,
-        max_age=refresh_max_age,
-        httponly=http_only,
-        secure=secure,
-        samesite=same_site,
-        path='/'
-    )
+    # Other devices have to log in again with the new credentials
+    UserSession.objects.filter(user=user).exclude(id=session_id).delete()
     
-    return expires_at
+    return issue_session_tokens(user, session_id)
 
 
-def clear_jwt_cookies(response):
-    """Clear JWT token cookies."""
-    cookie_name = getattr(settings, 'JWT_COOKIE_NAME', 'access_token')
-    response.delete_cookie(cookie_name, path='/')
-    response.delete_cookie('access_token_expires_at', path='/')
-    response.delete_cookie('refresh_token', path='/')
+def parse_json_body(request):
+    """Return the JSON object in the request body, or None if it is not one."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def hashing_busy_response():
+    """503 returned when the password hashing queue is full."""
+    response = JsonResponse(
+        {'error': 'The server is busy. Please try again in a moment.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
     return response
 
 
-class RegisterView(generics.CreateAPIView):
-    """User registration endpoint."""
-    queryset = User.objects.all()
-    serializer_class = UserRegistrationSerializer
-    permission_classes = [permissions.AllowAny]
-    
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        if not serializer.is_valid():
-            # Format errors for better frontend handling
-            errors = {}
-            for field, messages in serializer.errors.items():
-                if isinstance(messages, list):
-                    errors[field] = messages[0] if messages else 'Invalid value'
-                else:
-                    errors[field] = str(messages)
-            return Response(
-                {'error': errors.get('non_field_errors', errors) if 'non_field_errors' in errors else errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        user = serializer.save()
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        access_token = str(refresh.access_token)
-        refresh_token = str(refresh)
-        
-        # Set user as active (logged in after registration)
-        user.is_active = True
-        user.save()
-        
-        # Get expires_at by setting cookies on a temporary response
-        expires_at = set_jwt_cookies(Response(), access_token, refresh_token)
-        
-        # Create response with tokens in body
-        response = Response({
-            'user': UserProfileSerializer(user).data,
-            'message': 'User registered successfully',
-            'access_token': access_token,
-            'refresh_token': refresh_token,
-            'expires_at': expires_at,
-            'email': user.email
-        }, status=status.HTTP_201_CREATED)
-        
-        # Set JWT cookies on the actual response
-        set_jwt_cookies(response, access_token, refresh_token)
-        
-        return response
+def rate_limited_response(retry_after):
+    """429 returned when a login attempt is over the rate limit budget."""
+    response = JsonResponse(
+        {'error': 'Too many login attempts. Please try again later.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(max(math.ceil(retry_after), 1))
+    return response
 
 
-@api_view(['POST'])
-@permission_classes([permissions.AllowAny])
-def login_view(request):
-    """User login endpoint with session tracking."""
-    serializer = UserLoginSerializer(data=request.data, context={'request': request})
-    if not serializer.is_valid():
-        return Response(
-            {'error': serializer.errors.get('error', ['Invalid credentials'])[0] if isinstance(serializer.errors.get('error'), list) else serializer.errors.get('error', 'Invalid credentials')},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+def complete_registration(request, serializer, password_hash):
+    """Create the registered user, its first session and tokens; return (body, tokens)."""
+    user = serializer.save(password_hash=password_hash)
     
-    user = serializer.validated_data['user']
+    # Registration logs the user in: track it as the first session
+    session = UserSession.objects.create(
+        user=user,
+        ip_address=get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        connection_number=user.next_connection_number()
+    )
     
-    # Generate JWT tokens
-    refresh = RefreshToken.for_user(user)
-    access_token = str(refresh.access_token)
-    refresh_token = str(refresh)
+    # Generate JWT tokens bound to the session
+    tokens = issue_session_tokens(user, session.id)
     
+    # Set user as active (logged in after registration)
+    user.is_active = True
+    user.save()
+    
+    body = {
+        'user': UserProfileSerializer(user).data,
+        'message': 'User registered successfully',
+        **tokens.as_dict(),
+        'email': user.email
+    }
+    return body, tokens
+
+
+def complete_login(request, user, validated_data):
+    """Mark ``user`` logged in and open a session with tokens; return (body, tokens)."""
     # Update last login and set active
     user.last_login = timezone.now()
     user.is_active = True
@@ -208,16 +135,16 @@ def login_view(request):
     # Extract session metadata
     ip_address = get_client_ip(request)
     user_agent = request.META.get('HTTP_USER_AGENT', '')
-    screen_size = serializer.validated_data.get('screen_size', '')
-    timezone_str = serializer.validated_data.get('timezone', 'UTC')
-    language = serializer.validated_data.get('language', 'en-US')
-    extra_metadata = serializer.validated_data.get('extra_metadata', {})
+    screen_size = validated_data.get('screen_size', '')
+    timezone_str = validated_data.get('timezone', 'UTC')
+    language = validated_data.get('language', 'en-US')
+    extra_metadata = validated_data.get('extra_metadata', {})
     
-    # Get connection number (count existing sessions for this user)
-    connection_number = UserSession.objects.filter(user=user).count() + 1
+    # Get connection number from the user's atomic login counter
+    connection_number = user.next_connection_number()
     
     # Create user session record
-    UserSession.objects.create(
+    session = UserSession.objects.create(
         user=user,
         ip_address=ip_address,
         user_agent=user_agent,
@@ -228,23 +155,117 @@ def login_view(request):
         extra_metadata=extra_metadata
     )
     
-    # Get expires_at by setting cookies on a temporary response
-    expires_at = set_jwt_cookies(Response(), access_token, refresh_token)
+    # Generate JWT tokens bound to the session
+    tokens = issue_session_tokens(user, session.id)
     
-    # Create response with tokens in body
-    response = Response({
+    body = {
         'user': UserProfileSerializer(user).data,
         'message': 'Login successful',
-        'access_token': access_token,
-        'refresh_token': refresh_token,
-        'expires_at': expires_at,
+        **tokens.as_dict(),
         'email': user.email
+    }
+    return body, tokens
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RegisterView(View):
+    """User registration endpoint.
+    
+    Async so that hashing the password waits on the bounded hashing pool
+    instead of holding a worker; database work runs via sync_to_async.
+    """
+    
+    async def post(self, request, *args, **kwargs):
+        data = parse_json_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = UserRegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            # Format errors for better frontend handling
+            errors = {}
+            for field, messages in serializer.errors.items():
+                if isinstance(messages, list):
+                    errors[field] = messages[0] if messages else 'Invalid value'
+                else:
+                    errors[field] = str(messages)
+            return JsonResponse(
+                {'error': errors.get('non_field_errors', errors) if 'non_field_errors' in errors else errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            password_hash = await password_hashers.amake_password(serializer.validated_data['password'])
+        except HashPoolBusy:
+            return hashing_busy_response()
+        
+        body, tokens = await sync_to_async(complete_registration)(
+            request, serializer, password_hash
+        )
+        
+        # Create response with tokens in body and set JWT cookies
+        response = JsonResponse(body, status=status.HTTP_201_CREATED)
+        tokens.set_cookies(response)
+        
+        return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LoginView(View):
+    """User login endpoint with session tracking.
+    
+    Async so that the bcrypt check waits on the bounded hashing pool instead
+    of holding a worker. Every attempt costs exactly one hash.
+    """
+    
+    async def post(self, request, *args, **kwargs):
+        data = parse_json_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Reject over-budget attempts before the user lookup and the hash
+        email = data.get('email') if isinstance(data.get('email'), str) else None
+        try:
+            await login_limiter.ahit(get_client_ip(request), email)
+        except LoginRateLimited as e:
+            return rate_limited_response(e.retry_after)
+        
+        serializer = UserLoginSerializer(data=data, context={'request': request, 'defer_password_check': True})
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(
+                {'error': serializer.errors.get('error', ['Invalid credentials'])[0] if isinstance(serializer.errors.get('error'), list) else serializer.errors.get('error', 'Invalid credentials')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user = serializer.validated_data['user']
+        if not serializer.validated_data['password_checked']:
+            try:
+                is_correct = await password_hashers.acheck_user_password(user, serializer.validated_data['password'])
+            except HashPoolBusy:
+                return hashing_busy_response()
+            if not is_correct:
+                return JsonResponse({'error': 'Invalid email or password.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        await login_limiter.areset_email(email)
+        body, tokens = await sync_to_async(complete_login)(
+            request, user, serializer.validated_data
+        )
+        
+        # Create response with tokens in body and set JWT cookies
+        response = JsonResponse(body, status=status.HTTP_200_OK)
+        tokens.set_cookies(response)
+        
+        return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdministrator])
+def login_metrics_view(request):
+    """Report login protection metrics of this process (Administrator only)."""
+    return Response({
+        'password_hashing': password_hashers.stats(),
+        'login_rate_limit': login_limiter.stats(),
     }, status=status.HTTP_200_OK)
-    
-    # Set JWT cookies on the actual response
-    set_jwt_cookies(response, access_token, refresh_token)
-    
-    return response
 
 
 @api_view(['POST'])
@@ -262,27 +283,37 @@ def refresh_token_view(request):
     try:
         # Create RefreshToken instance and get new access token
         refresh = RefreshToken(refresh_token)
-        access_token = str(refresh.access_token)
-        new_refresh_token = str(refresh)
+        
+        # Tokens revoked by a token version bump cannot be refreshed
+        if not token_versions.is_current(refresh.get('user_id'), get_token_version(refresh)):
+            return Response(
+                {'error': 'Token has been revoked'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        # Tokens of a revoked (deleted) session cannot be refreshed
+        session_id = get_token_session_id(refresh)
+        if session_id is not None and not UserSession.objects.filter(id=session_id).exists():
+            return Response(
+                {'error': 'Session has been revoked'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        tokens = IssuedTokens(refresh)
         
         # Get user from token
         user_id = refresh.get('user_id')
         user = User.objects.get(id=user_id)
         
-        # Get expires_at by setting cookies on a temporary response
-        expires_at = set_jwt_cookies(Response(), access_token, new_refresh_token)
-        
         # Create response with new tokens
         response = Response({
-            'access_token': access_token,
-            'refresh_token': new_refresh_token,
-            'expires_at': expires_at,
+            **tokens.as_dict(),
             'email': user.email,
             'message': 'Token refreshed successfully'
         }, status=status.HTTP_200_OK)
         
-        # Set JWT cookies on the actual response
-        set_jwt_cookies(response, access_token, new_refresh_token)
+        # Set JWT cookies on the response
+        tokens.set_cookies(response)
         
         return response
     except Exception as e:
@@ -298,24 +329,18 @@ def logout_view(request):
     """User logout endpoint."""
     user = request.user
     
-    # Get the most recent session for this user and mark it as inactive (delete it)
-    # In a real scenario, you might want to keep session history, but for now we'll delete
-    UserSession.objects.filter(user=user).order_by('-created_at').first()
-    # Delete all active sessions for this user
-    UserSession.objects.filter(user=user).delete()
+    # End the session the access token belongs to; tokens issued before
+    # sessions were bound to tokens end all of the user's sessions
+    session_id = get_token_session_id(request.auth)
+    if session_id is not None:
+        UserSession.objects.filter(id=session_id, user=user).delete()
+    else:
+        UserSession.objects.filter(user=user).delete()
     
-    # Try to blacklist refresh token if provided
-    try:
-        refresh_token = request.data.get('refresh_token')
-        if refresh_token:
-            token = RefreshToken(refresh_token)
-            token.blacklist()
-    except Exception:
-        pass
-    
-    # Set is_active to False
-    user.is_active = False
-    user.save()
+    # Set is_active to False once no device is logged in
+    if not UserSession.objects.filter(user=user).exists():
+        user.is_active = False
+        user.save()
     
     # Create response
     response = Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
@@ -326,6 +351,44 @@ def logout_view(request):
     return response
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def logout_all_view(request):
+    """Log out from every device by revoking all of the user's tokens."""
+    user = request.user
+    user.revoke_tokens()
+    UserSession.objects.filter(user=user).delete()
+    
+    user.is_active = False
+    user.save()
+    
+    response = Response({'message': 'Logged out from all devices'}, status=status.HTTP_200_OK)
+    clear_jwt_cookies(response)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def session_list_view(request):
+    """List the current user's sessions (logged-in devices)."""
+    sessions = UserSession.objects.filter(user=request.user)
+    current_session_id = get_token_session_id(request.auth)
+    data = UserSessionSerializer(sessions, many=True).data
+    for item in data:
+        item['is_current'] = item['id'] == current_session_id
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def revoke_session_view(request, session_id):
+    """Revoke one of the current user's sessions (log out a device)."""
+    deleted, _ = UserSession.objects.filter(id=session_id, user=request.user).delete()
+    if not deleted:
+        return Response({'error': 'Session not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'Session revoked successfully'}, status=status.HTTP_200_OK)
+
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     """User profile view and update."""
     serializer_class = UserProfileSerializer
@@ -388,7 +451,15 @@ def change_password_view(request):
     user.set_password(serializer.validated_data['new_password'])
     user.save()
     
-    return Response({'message': 'Password changed successfully'}, status=status.HTTP_200_OK)
+    # Tokens issued before the change stop working; this device gets new ones
+    tokens = reissue_session_tokens(request, user)
+    response = Response({
+        'message': 'Password changed successfully',
+        **tokens.as_dict()
+    }, status=status.HTTP_200_OK)
+    tokens.set_cookies(response)
+    
+    return response
 
 
 @api_view(['POST'])
@@ -417,8 +488,14 @@ def change_email_view(request):
     user.email = new_email
     user.save()
     
-    return Response({
+    # Tokens issued before the change stop working; this device gets new ones
+    tokens = reissue_session_tokens(request, user)
+    response = Response({
         'message': 'Email changed successfully',
         'old_email': old_email,
-        'new_email': new_email
+        'new_email': new_email,
+        **tokens.as_dict()
     }, status=status.HTTP_200_OK)
+    tokens.set_cookies(response)
+    
+    return response
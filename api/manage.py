@@ -2,7 +2,6 @@
 """Django's command-line utility for administrative tasks."""
 import os
 import sys
-from pathlib import Path
 
 
 def main():
@@ -21,15 +20,10 @@ def main():
         # If no port specified, read from settings.yaml
         if not port_specified:
             try:
-                import yaml
-                BASE_DIR = Path(__file__).resolve().parent.parent
-                SETTINGS_YAML_PATH = BASE_DIR / 'settings.yaml'
-                if SETTINGS_YAML_PATH.exists():
-                    with open(SETTINGS_YAML_PATH, 'r') as f:
-                        config = yaml.safe_load(f)
-                    port = config.get('server', {}).get('port', 8000)
-                    # Add port to sys.argv if not already present
-                    sys.argv.append(str(port))
+                from taskboard.config import config
+                port = config.get_int('server', 'port', 8000)
+                # Add port to sys.argv if not already present
+                sys.argv.append(str(port))
             except Exception:
                 # If reading settings.yaml fails, use default port 8000
                 pass
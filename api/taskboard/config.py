@@ -0,0 +1,101 @@
+"""
+Cached access to settings.yaml.
+
+The file is parsed once and kept in memory. Reads check its mtime at most
+every ``check_interval`` seconds and re-parse it only when it changed, so
+hot paths (e.g. login) do no file I/O or YAML parsing. If a changed file
+fails to parse, the last good configuration stays in use.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import yaml
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+SETTINGS_YAML_PATH = BASE_DIR / 'settings.yaml'
+
+_TRUE_STRINGS = ('1', 'true', 'yes', 'on')
+_FALSE_STRINGS = ('0', 'false', 'no', 'off', '')
+
+
+class YamlConfig:
+    """A YAML file of ``section: {key: value}`` mappings, reloaded when it changes."""
+    check_interval = 1.0
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _read(self):
+        with open(self.path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ImproperlyConfigured(f'{self.path} must contain a mapping')
+        return data
+
+    def load(self):
+        """Return the parsed file, re-reading it if its mtime changed."""
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return data
+        with self._lock:
+            self._checked_at = time.monotonic()
+            mtime = None
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if self._data is None or mtime != self._mtime:
+                    self._data = self._read()
+            except Exception:
+                if self._data is None:
+                    raise
+                logger.exception('Could not reload %s; keeping the previous configuration', self.path)
+            self._mtime = mtime
+            return self._data
+
+    def section(self, name):
+        """Return one top-level section as a dict (empty if missing)."""
+        return self.load().get(name) or {}
+
+    def get(self, section, key, default=None):
+        """Return a raw value, or ``default`` if the section or key is missing."""
+        value = self.section(section).get(key)
+        return default if value is None else value
+
+    def get_str(self, section, key, default=None):
+        value = self.get(section, key, default)
+        return value if value is None else str(value)
+
+    def get_int(self, section, key, default=None):
+        value = self.get(section, key, default)
+        try:
+            return value if value is None else int(value)
+        except (TypeError, ValueError):
+            raise ImproperlyConfigured(f'{section}.{key} in {self.path.name} must be an integer')
+
+    def get_bool(self, section, key, default=None):
+        value = self.get(section, key, default)
+        if value is None or isinstance(value, bool):
+            return value
+        if str(value).strip().lower() in _TRUE_STRINGS:
+            return True
+        if str(value).strip().lower() in _FALSE_STRINGS:
+            return False
+        raise ImproperlyConfigured(f'{section}.{key} in {self.path.name} must be a boolean')
+
+    def get_list(self, section, key, default=None):
+        value = self.get(section, key, default)
+        if value is None or isinstance(value, list):
+            return value
+        return [value]
+
+
+config = YamlConfig(SETTINGS_YAML_PATH)
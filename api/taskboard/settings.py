@@ -4,28 +4,28 @@ Loads configuration from settings.yaml file in project root.
 """
 
 import os
-import yaml
 from pathlib import Path
 from datetime import timedelta
 
+from .config import SETTINGS_YAML_PATH, config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-# Load settings from YAML file
-SETTINGS_YAML_PATH = BASE_DIR / 'settings.yaml'
-with open(SETTINGS_YAML_PATH, 'r') as f:
-    config = yaml.safe_load(f)
-
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = config.get('jwt', {}).get('secret_key', 'django-insecure-change-in-production')
+SECRET_KEY = config.get_str('jwt', 'secret_key', 'django-insecure-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = config.get('server', {}).get('debug', True)
+DEBUG = config.get_bool('server', 'debug', True)
 
-ALLOWED_HOSTS = config.get('server', {}).get('allowed_hosts', ['localhost', '127.0.0.1'])
+ALLOWED_HOSTS = config.get_list('server', 'allowed_hosts', ['localhost', '127.0.0.1'])
 
 # Server port from settings.yaml
-SERVER_PORT = config.get('server', {}).get('port', 8000)
+SERVER_PORT = config.get_int('server', 'port', 8000)
+
+# Reverse proxies in front of the app that append to X-Forwarded-For; the
+# client IP is read that many hops from the right (0: REMOTE_ADDR only)
+TRUSTED_PROXY_COUNT = config.get_int('server', 'trusted_proxies', 0)
 
 # Application definition
 INSTALLED_APPS = [
@@ -77,14 +77,38 @@ WSGI_APPLICATION = 'taskboard.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config.get('database', {}).get('name', 'taskboard_db'),
-        'USER': config.get('database', {}).get('user', 'postgres'),
-        'PASSWORD': config.get('database', {}).get('password', ''),
-        'HOST': config.get('database', {}).get('host', 'localhost'),
-        'PORT': config.get('database', {}).get('port', '5432'),
+        'NAME': config.get_str('database', 'name', 'taskboard_db'),
+        'USER': config.get_str('database', 'user', 'postgres'),
+        'PASSWORD': config.get_str('database', 'password', ''),
+        'HOST': config.get_str('database', 'host', 'localhost'),
+        'PORT': config.get_str('database', 'port', '5432'),
     }
 }
 
+# Cache backends (local memory by default; point at a shared backend in production)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskboard-default',
+    }
+}
+
+# Public task feed cache: CACHES alias and page lifetime in seconds
+PUBLIC_FEED_CACHE_ALIAS = config.get_str('cache', 'public_feed_alias', 'default')
+PUBLIC_FEED_CACHE_TIMEOUT = config.get_int('cache', 'public_feed_timeout', 300)
+
+# Role registry: optional shared CACHES alias used as a cross-process version
+# stamp, and how often (seconds) each process checks it
+ROLE_REGISTRY_VERSION_CACHE = config.get_str('cache', 'role_registry_alias')
+ROLE_REGISTRY_VERSION_CHECK_INTERVAL = config.get_int('cache', 'role_registry_check_interval', 5)
+
+# Token version cache (see accounts/revocation.py): CACHES alias and lifetime
+# in seconds. The default alias is per process, so another process can still
+# accept a revoked token for up to the lifetime; keep it short, and point the
+# alias at a shared backend in production so revocations apply everywhere at once.
+TOKEN_VERSION_CACHE_ALIAS = config.get_str('cache', 'token_version_alias', 'default')
+TOKEN_VERSION_CACHE_TIMEOUT = config.get_int('cache', 'token_version_timeout', 30)
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -104,9 +128,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing pool (see accounts/hashing.py): concurrent hashes and how
+# many more may wait before logins and registrations are answered with 503
+PASSWORD_HASH_WORKERS = config.get_int('hashing', 'workers', min(4, os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE = config.get_int('hashing', 'queue_size', 64)
+
+# bcrypt cost for new hashes; hashes with another cost are upgraded on the
+# next successful login (pick it with `manage.py calibrate_hashers`)
+PASSWORD_HASH_BCRYPT_ROUNDS = config.get_int('hashing', 'bcrypt_rounds', 12)
+
+# Login attempt limiter (see accounts/ratelimit.py): "memory" (per process)
+# or "cache" (the LOGIN_RATE_LIMIT_CACHE_ALIAS backend, shared between
+# processes), sliding window in seconds and attempts allowed per window per
+# client IP and per email (0 disables that limit)
+LOGIN_RATE_LIMIT_BACKEND = config.get_str('login_rate_limit', 'backend', 'memory')
+LOGIN_RATE_LIMIT_CACHE_ALIAS = config.get_str('login_rate_limit', 'cache_alias', 'default')
+LOGIN_RATE_LIMIT_WINDOW = config.get_int('login_rate_limit', 'window', 300)
+LOGIN_RATE_LIMIT_PER_IP = config.get_int('login_rate_limit', 'max_per_ip', 50)
+LOGIN_RATE_LIMIT_PER_EMAIL = config.get_int('login_rate_limit', 'max_per_email', 10)
+
 # Password hashing - Use bcrypt
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.BCryptPasswordHasher',
+    'accounts.hashers.ConfiguredBCryptPasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
     'django.contrib.auth.hashers.Argon2PasswordHasher',
@@ -139,7 +182,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.VersionedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -152,10 +195,11 @@ REST_FRAMEWORK = {
 
 # JWT Configuration
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config.get('jwt', {}).get('access_token_lifetime', 60)),
-    'REFRESH_TOKEN_LIFETIME': timedelta(minutes=config.get('jwt', {}).get('refresh_token_lifetime', 1440)),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config.get_int('jwt', 'access_token_lifetime', 60)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(minutes=config.get_int('jwt', 'refresh_token_lifetime', 1440)),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    # Revocation uses User.token_version instead of the blacklist tables
+    'BLACKLIST_AFTER_ROTATION': False,
     'UPDATE_LAST_LOGIN': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -170,7 +214,39 @@ JWT_COOKIE_NAME = 'access_token'
 JWT_COOKIE_HTTPONLY = True
 JWT_COOKIE_SECURE = not DEBUG  # Only use secure cookies in production
 JWT_COOKIE_SAMESITE = 'Lax'
-JWT_COOKIE_MAX_AGE = int(config.get('jwt', {}).get('access_token_lifetime', 60)) * 60  # Convert minutes to seconds
+JWT_COOKIE_MAX_AGE = config.get_int('jwt', 'access_token_lifetime', 60) * 60  # Convert minutes to seconds
+
+# Session activity write-behind buffer (see accounts/activity.py): flush
+# interval in seconds, flush size in sessions, and how many seconds of
+# last_activity_at lag are tolerated before the same session is recorded again
+SESSION_ACTIVITY_FLUSH_INTERVAL = config.get_int('sessions', 'activity_flush_interval', 30)
+SESSION_ACTIVITY_FLUSH_SIZE = config.get_int('sessions', 'activity_flush_size', 500)
+SESSION_ACTIVITY_STALENESS = config.get_int('sessions', 'activity_staleness', 60)
+
+# user_sessions partitions (see accounts/partitions.py): months of sessions
+# kept before manage_session_partitions rolls them up and drops them (0 keeps
+# them forever), and how many monthly partitions to create ahead of time
+SESSION_RETENTION_MONTHS = config.get_int('sessions', 'retention_months', 12)
+SESSION_PARTITIONS_AHEAD = config.get_int('sessions', 'partitions_ahead', 2)
+
+# Task change stream (see tasks/events.py): "memory" delivers events to the
+# streams of the writing process only, "postgres" fans them out to every
+# process with NOTIFY on the given channel; seconds between keepalive
+# comments, and events queued per stream before it is told to resync
+TASK_EVENTS_BACKEND = config.get_str('events', 'backend', 'memory')
+TASK_EVENTS_CHANNEL = config.get_str('events', 'channel', 'task_events')
+TASK_EVENTS_HEARTBEAT = config.get_int('events', 'heartbeat', 25)
+TASK_EVENTS_QUEUE_SIZE = config.get_int('events', 'queue_size', 100)
+
+# Soft-deleted task archive (see tasks/archive.py): days a deleted task stays
+# in user_tasks before archive_deleted_tasks moves it to archived_user_tasks,
+# tasks per batch transaction, pause between batches and the longest wait for
+# a row lock in milliseconds, and seconds between runs with --loop
+TASK_ARCHIVE_RETENTION_DAYS = config.get_int('archive', 'retention_days', 30)
+TASK_ARCHIVE_BATCH_SIZE = config.get_int('archive', 'batch_size', 500)
+TASK_ARCHIVE_BATCH_DELAY_MS = config.get_int('archive', 'batch_delay_ms', 200)
+TASK_ARCHIVE_LOCK_TIMEOUT_MS = config.get_int('archive', 'lock_timeout_ms', 2000)
+TASK_ARCHIVE_INTERVAL = config.get_int('archive', 'interval', 3600)
 
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -179,4 +255,6 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
+    # The async register and login views are not DRF views; see accounts/schema.py
+    'PREPROCESSING_HOOKS': ['accounts.schema.add_auth_endpoints'],
 }
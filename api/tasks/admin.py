@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserTask
+from .models import ArchivedTask, UserTask
 
 
 @admin.register(UserTask)
@@ -16,3 +16,18 @@ class UserTaskAdmin(admin.ModelAdmin):
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
         ('Status', {'fields': ('is_deleted',)}),
     )
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    """Read-only view of archived tasks; restore them with restore_archived_tasks."""
+    list_display = ['title', 'user', 'status', 'updated_at', 'archived_at']
+    list_filter = ['status', 'archived_at']
+    search_fields = ['title', 'user__email']
+    ordering = ['-archived_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,190 @@
+"""
+Archive of soft-deleted tasks.
+
+Soft-deleted tasks stay in user_tasks (and its indexes) until
+``archive_tasks_batch`` moves them into archived_user_tasks, once they
+were deleted more than the retention period ago. Retention is keyed on
+``updated_at``, which a soft delete sets and which the (updated_at, id)
+index covers, so editing a task in the trash restarts its retention.
+Tasks move as whole subtrees, so parent links and the closure table never
+point at archived rows: a subtree is archived only when all of its tasks
+are soft-deleted and past retention. Archived rows keep their
+``deleted_at`` and ``deletion_id``, so a restore puts the trash back as
+it was.
+
+Each batch is its own short transaction that skips rows locked by other
+writers and gives up on a lock after ``lock_timeout``, so the job never
+stalls requests on the live table. ``restore_archived_tasks`` moves
+archived subtrees back.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from .models import UserTask, UserTaskClosure
+
+ARCHIVED_COLUMNS = (
+    'id, title, description, user_id, parent_id, status, created_at, updated_at, deleted_at, deletion_id'
+)
+
+# "Closed" tasks are soft-deleted before the cutoff with every descendant
+# too; a root is a closed task whose parent is not closed
+_CLOSED = """
+    {alias}.is_deleted AND {alias}.updated_at < %(cutoff)s
+    AND NOT EXISTS (
+        SELECT 1 FROM user_task_closure c
+        JOIN user_tasks d ON d.id = c.descendant_id
+        WHERE c.ancestor_id = {alias}.id AND c.depth > 0
+        AND NOT (d.is_deleted AND d.updated_at < %(cutoff)s)
+    )
+"""
+
+SELECT_ROOTS_SQL = f"""
+    WITH roots AS (
+        SELECT t.id, t.updated_at FROM user_tasks t
+        WHERE {_CLOSED.format(alias='t')}
+        AND NOT EXISTS (
+            SELECT 1 FROM user_tasks p WHERE p.id = t.parent_id AND {_CLOSED.format(alias='p')}
+        )
+        ORDER BY t.updated_at, t.id
+        LIMIT %(limit)s
+        FOR UPDATE OF t SKIP LOCKED
+    )
+    SELECT r.id, (SELECT COUNT(*) FROM user_task_closure c WHERE c.ancestor_id = r.id)
+    FROM roots r
+    ORDER BY r.updated_at, r.id
+"""
+
+
+class ArchiveConflict(Exception):
+    """A task of the batch was changed while it was being archived."""
+
+
+def archive_candidates(cutoff):
+    """Return how many soft-deleted tasks were deleted before ``cutoff``."""
+    return UserTask.objects.only_deleted().filter(updated_at__lt=cutoff).count()
+
+
+def archive_tasks_batch(cutoff, batch_size, lock_timeout_ms=2000):
+    """Move up to about ``batch_size`` tasks of closed subtrees into the archive.
+
+    A subtree larger than ``batch_size`` is still moved whole. Returns the
+    number of tasks archived; 0 when nothing is left. Raises ArchiveConflict
+    (after rolling back) if a task was restored or changed meanwhile.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f'{lock_timeout_ms}ms'])
+        cursor.execute(SELECT_ROOTS_SQL, {'cutoff': cutoff, 'limit': batch_size})
+        root_ids, total = [], 0
+        for root_id, size in cursor.fetchall():
+            if root_ids and total + size > batch_size:
+                break
+            root_ids.append(root_id)
+            total += size
+        if not root_ids:
+            return 0
+
+        cursor.execute(
+            'SELECT descendant_id FROM user_task_closure WHERE ancestor_id = ANY(%s)',
+            [root_ids]
+        )
+        task_ids = [row[0] for row in cursor.fetchall()]
+        # Closure rows are deleted first; the foreign keys are checked at commit
+        cursor.execute('DELETE FROM user_task_closure WHERE descendant_id = ANY(%s)', [task_ids])
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM user_tasks
+                WHERE id = ANY(%s) AND is_deleted AND updated_at < %s
+                RETURNING {ARCHIVED_COLUMNS}
+            )
+            INSERT INTO archived_user_tasks ({ARCHIVED_COLUMNS}, archived_at)
+            SELECT {ARCHIVED_COLUMNS}, now() FROM moved
+            """,
+            [task_ids, cutoff]
+        )
+        if cursor.rowcount != len(task_ids):
+            raise ArchiveConflict(f'{len(task_ids) - cursor.rowcount} tasks changed while being archived')
+        return cursor.rowcount
+
+
+def restore_archived_tasks(task_ids=None, user_id=None, undelete=False):
+    """Move archived subtrees back into user_tasks; return (tasks restored, tasks undeleted).
+
+    Restores the subtrees under ``task_ids``, or every archived task of
+    ``user_id``. A task whose parent no longer exists comes back as a
+    top-level task. Restored tasks return to the trash with their original
+    deletions (for another retention period). With ``undelete`` the restored
+    roots are also restored from the trash like TaskRestoreView does, except
+    for roots under a task that is still deleted: those stay in the trash.
+    """
+    if task_ids:
+        start = 'SELECT id, parent_id, 0 FROM archived_user_tasks WHERE id = ANY(%s)'
+        params = [list(task_ids)]
+    elif user_id is not None:
+        start = """
+            SELECT a.id, a.parent_id, 0 FROM archived_user_tasks a
+            WHERE a.user_id = %s
+            AND NOT EXISTS (SELECT 1 FROM archived_user_tasks p WHERE p.id = a.parent_id AND p.user_id = a.user_id)
+        """
+        params = [user_id]
+    else:
+        return 0, 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH RECURSIVE subtree(id, parent_id, depth) AS (
+                {start}
+                UNION
+                SELECT a.id, a.parent_id, s.depth + 1
+                FROM archived_user_tasks a JOIN subtree s ON a.parent_id = s.id
+            )
+            SELECT id, parent_id, MAX(depth) FROM subtree GROUP BY id, parent_id
+            """,
+            params
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0, 0
+        ids = [task_id for task_id, _, _ in rows]
+
+        cursor.execute(
+            """
+            INSERT INTO user_tasks (
+                id, title, description, user_id, parent_id, status, created_at, updated_at, is_deleted,
+                deleted_at, deletion_id
+            )
+            SELECT a.id, a.title, a.description, a.user_id,
+                CASE WHEN a.parent_id = ANY(%s) OR EXISTS (SELECT 1 FROM user_tasks p WHERE p.id = a.parent_id)
+                    THEN a.parent_id END,
+                a.status, a.created_at, now(), true, COALESCE(a.deleted_at, a.updated_at), a.deletion_id
+            FROM archived_user_tasks a
+            WHERE a.id = ANY(%s)
+            RETURNING id, parent_id
+            """,
+            [ids, ids]
+        )
+        parents = dict(cursor.fetchall())
+        cursor.execute('DELETE FROM archived_user_tasks WHERE id = ANY(%s)', [ids])
+
+        # Parents need their closure rows before their children get theirs
+        levels = defaultdict(list)
+        for task_id, _, depth in rows:
+            levels[depth].append((task_id, parents[task_id]))
+        for depth in sorted(levels):
+            UserTaskClosure.objects.insert_nodes(levels[depth])
+
+        undeleted = 0
+        if undelete:
+            root_ids = [task_id for task_id, _ in levels[0]]
+            # Same rule as TaskRestoreView: no live task under a deleted one
+            under_deleted = set(UserTaskClosure.objects.filter(
+                descendant_id__in=root_ids,
+                depth__gt=0,
+                ancestor__is_deleted=True
+            ).values_list('descendant_id', flat=True))
+            undeleted = UserTask.objects.restore_subtrees(
+                [task_id for task_id in root_ids if task_id not in under_deleted]
+            )
+    return len(ids), undeleted
@@ -0,0 +1,162 @@
+"""
+Batch task operations.
+
+A batch is a list of ``create``, ``update`` and ``delete`` operations that
+are checked and written together in one transaction. One query loads (and
+locks) every referenced task the user may manage, two check the parents
+of new tasks (they must exist and not be deleted by the batch), and the
+writes are one bulk_create plus one closure insert, one bulk_update and
+one subtree soft delete. Invalid operations are reported in the results
+and skipped; the others are applied.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UserTask, UserTaskClosure
+from .permissions import filter_visible_tasks
+from .serializers import TaskBatchFieldsSerializer
+from .signals import tasks_changed
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+def _is_task_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+class TaskBatch:
+    """Applies one batch of task operations on behalf of ``user``."""
+
+    def __init__(self, user, operations):
+        self.user = user
+        self.operations = operations
+        self.results = [None] * len(operations)
+        self.counts = {'created': 0, 'updated': 0, 'deleted': 0}
+
+    def fail(self, index, error):
+        self.results[index] = {'op': self.operations[index].get('op'), 'success': False, 'error': error}
+        task_id = self.operations[index].get('id')
+        if task_id is not None:
+            self.results[index]['id'] = task_id
+
+    def succeed(self, index, task_id):
+        self.results[index] = {'op': self.operations[index]['op'], 'success': True, 'id': task_id}
+
+    def apply(self):
+        """Validate and apply the batch; return the per-operation results."""
+        creates, updates, deletes = [], [], []
+        positions = {}
+        for index, operation in enumerate(self.operations):
+            kind = operation.get('op')
+            if kind not in OPERATIONS:
+                self.fail(index, {'op': f'Must be one of: {", ".join(OPERATIONS)}'})
+            elif kind == 'create':
+                creates.append(index)
+            elif not _is_task_id(operation.get('id')):
+                self.fail(index, {'id': 'A task id is required.'})
+            elif operation['id'] in positions:
+                self.fail(index, {'id': f'Task already used by operation {positions[operation["id"]]}.'})
+            else:
+                positions[operation['id']] = index
+                (updates if kind == 'update' else deletes).append(index)
+
+        with transaction.atomic():
+            tasks = {
+                task.id: task
+                for task in filter_visible_tasks(
+                    self.user, UserTask.objects.filter(id__in=list(positions))
+                ).select_for_update(of=('self',))
+            }
+            deleted_root_ids = [self.operations[index]['id'] for index in deletes if self.operations[index]['id'] in tasks]
+            created_ids = self.create(creates, deleted_root_ids)
+            updated_ids = self.update(updates, tasks)
+            self.delete(deletes, tasks)
+            if created_ids:
+                tasks_changed.send(sender=UserTask, task_ids=created_ids, created=True)
+            if updated_ids:
+                tasks_changed.send(sender=UserTask, task_ids=updated_ids)
+        return self.results
+
+    def create(self, indexes, deleted_root_ids):
+        parent_ids = {
+            self.operations[index].get('parent_id') for index in indexes
+            if _is_task_id(self.operations[index].get('parent_id'))
+        }
+        existing_parents = set(UserTask.objects.filter(id__in=parent_ids).values_list('id', flat=True))
+        # Parents inside a subtree that the batch deletes
+        deleted_parents = set()
+        if existing_parents and deleted_root_ids:
+            deleted_parents = set(UserTaskClosure.objects.filter(
+                ancestor_id__in=deleted_root_ids,
+                descendant_id__in=existing_parents
+            ).values_list('descendant_id', flat=True))
+
+        new_tasks = []
+        for index in indexes:
+            operation = self.operations[index]
+            serializer = TaskBatchFieldsSerializer(data=operation)
+            if not serializer.is_valid():
+                self.fail(index, serializer.errors)
+                continue
+            parent_id = operation.get('parent_id')
+            # True == 1, so a bare membership test would accept it as task 1
+            if parent_id is not None and (not _is_task_id(parent_id) or parent_id not in existing_parents):
+                self.fail(index, {'parent_id': f'Invalid pk "{parent_id}" - object does not exist.'})
+                continue
+            if parent_id in deleted_parents:
+                self.fail(index, {'parent_id': 'The parent task is deleted in this batch.'})
+                continue
+            new_tasks.append((index, UserTask(user_id=self.user.id, parent_id=parent_id, **serializer.validated_data)))
+
+        if not new_tasks:
+            return []
+        UserTask.objects.bulk_create([task for _, task in new_tasks])
+        UserTaskClosure.objects.insert_nodes([(task.id, task.parent_id) for _, task in new_tasks])
+        for index, task in new_tasks:
+            self.succeed(index, task.id)
+        self.counts['created'] = len(new_tasks)
+        return [task.id for _, task in new_tasks]
+
+    def update(self, indexes, tasks):
+        now = timezone.now()
+        changed, fields = [], set()
+        for index in indexes:
+            operation = self.operations[index]
+            task = tasks.get(operation['id'])
+            if task is None:
+                self.fail(index, {'detail': 'Not found.'})
+                continue
+            if 'parent_id' in operation and operation['parent_id'] != task.parent_id:
+                # Moves re-link closure rows one subtree at a time (see UserTask.save)
+                self.fail(index, {'parent_id': 'Tasks cannot be moved in a batch; use PATCH /api/tasks/<id>/.'})
+                continue
+            data = {key: value for key, value in operation.items() if key not in ('op', 'id', 'parent_id')}
+            serializer = TaskBatchFieldsSerializer(task, data=data, partial=True)
+            if not serializer.is_valid():
+                self.fail(index, serializer.errors)
+                continue
+            for name, value in serializer.validated_data.items():
+                setattr(task, name, value)
+                fields.add(name)
+            # bulk_update() does not apply auto_now
+            task.updated_at = now
+            changed.append(task)
+            self.succeed(index, task.id)
+
+        if changed:
+            UserTask.objects.bulk_update(changed, sorted(fields) + ['updated_at'])
+        self.counts['updated'] = len(changed)
+        return [task.id for task in changed]
+
+    def delete(self, indexes, tasks):
+        root_ids = []
+        for index in indexes:
+            task_id = self.operations[index]['id']
+            if task_id in tasks:
+                root_ids.append(task_id)
+                self.succeed(index, task_id)
+            else:
+                self.fail(index, {'detail': 'Not found.'})
+        if root_ids:
+            # Counts every task of the subtrees, like the single delete endpoint
+            self.counts['deleted'] = UserTask.objects.soft_delete_subtrees(root_ids)
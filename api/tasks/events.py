@@ -0,0 +1,296 @@
+"""
+Server-push of task changes.
+
+Signal receivers publish task events (created, updated, deleted) once the
+writing transaction commits. The broker fans them out to the event streams
+(server-sent events, see TaskEventStreamView) of the users allowed to see
+the tasks, by the rules of filter_visible_tasks. Events carry only task
+ids; clients fetch the rows through the delta sync endpoint.
+
+The backend (``TASK_EVENTS_BACKEND``) decides how events reach brokers:
+
+* ``memory`` dispatches them in-process, so only streams served by the
+  writing process see them.
+* ``postgres`` sends them with NOTIFY on ``TASK_EVENTS_CHANNEL``; a LISTEN
+  connection per process (a daemon thread) feeds the local broker, so
+  streams in every process see every event.
+
+Subscriptions are asyncio queues indexed by user and role, so an idle
+stream costs one suspended coroutine and fan-out never scans unrelated
+subscribers.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Q
+
+from accounts.roles import role_registry
+
+from .models import UserTask, UserTaskClosure
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One event stream: a bounded queue read on the stream's event loop."""
+
+    def __init__(self, user_id, scope, loop, max_queue):
+        self.user_id = user_id
+        self.scope = scope
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Queue ``event``; runs on the subscription's loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client fell behind; it is told to resync instead
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Return the next event, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBackend:
+    """Dispatches events to the broker of this process only."""
+    shared = False
+
+    def start(self, broker):
+        pass
+
+    def publish(self, broker, events):
+        for event in events:
+            broker.dispatch(event)
+
+
+class PostgresBackend:
+    """Sends events with NOTIFY and dispatches the ones received via LISTEN."""
+    shared = True
+    poll_timeout = 5
+    reconnect_delay = 5
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, broker):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._listen, args=(broker,), name='task-events-listener', daemon=True
+                )
+                self._thread.start()
+
+    def publish(self, broker, events):
+        with connection.cursor() as cursor:
+            for event in events:
+                cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, json.dumps(event, separators=(',', ':'))])
+
+    def _listen(self, broker):
+        connected_before = False
+        while True:
+            listener = connections.create_connection('default')
+            try:
+                listener.ensure_connection()
+                with listener.connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {listener.ops.quote_name(self.channel)}')
+                if connected_before:
+                    # Events sent while disconnected are lost
+                    broker.broadcast({'type': 'resync'})
+                connected_before = True
+                raw = listener.connection
+                while True:
+                    if select.select([raw], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        broker.dispatch(json.loads(raw.notifies.pop(0).payload))
+            except Exception:
+                logger.exception('Task event listener failed; reconnecting in %s s', self.reconnect_delay)
+            finally:
+                listener.close()
+            time.sleep(self.reconnect_delay)
+
+
+class TaskEventBroker:
+    """Fans task events out to the subscriptions allowed to see them."""
+    max_ids_per_event = 200
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backend = None
+        self._by_user = defaultdict(set)
+        self._by_scope = {'all': set(), 'moderator': set()}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    if getattr(settings, 'TASK_EVENTS_BACKEND', 'memory') == 'postgres':
+                        self._backend = PostgresBackend(getattr(settings, 'TASK_EVENTS_CHANNEL', 'task_events'))
+                    else:
+                        self._backend = MemoryBackend()
+        return self._backend
+
+    @property
+    def heartbeat(self):
+        return getattr(settings, 'TASK_EVENTS_HEARTBEAT', 25)
+
+    @property
+    def max_queue(self):
+        return getattr(settings, 'TASK_EVENTS_QUEUE_SIZE', 100)
+
+    @staticmethod
+    def visibility_scope(user):
+        """Return which tasks ``user`` may see: all, moderator (regular users' and own) or own."""
+        if user.is_administrator():
+            return 'all'
+        if user.is_moderator() and role_registry.role_id('user'):
+            return 'moderator'
+        return 'own'
+
+    def subscribe(self, user_id, scope, loop):
+        subscription = Subscription(user_id, scope, loop, self.max_queue)
+        with self._lock:
+            self._by_user[user_id].add(subscription)
+            if scope in self._by_scope:
+                self._by_scope[scope].add(subscription)
+        self.backend.start(self)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._by_user.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._by_user[subscription.user_id]
+            self._by_scope.get(subscription.scope, set()).discard(subscription)
+
+    def recipients(self, event):
+        with self._lock:
+            recipients = set(self._by_scope['all'])
+            if event['owner_is_user']:
+                recipients |= self._by_scope['moderator']
+            recipients |= self._by_user.get(event['user_id'], set())
+        return recipients
+
+    def dispatch(self, event):
+        """Deliver an event to its recipients; callable from any thread."""
+        self._deliver(self.recipients(event), {'type': event['type'], 'task_ids': event['task_ids']})
+
+    def broadcast(self, event):
+        """Deliver ``event`` to every subscription."""
+        with self._lock:
+            recipients = set().union(*self._by_user.values())
+        self._deliver(recipients, event)
+
+    def _deliver(self, recipients, event):
+        by_loop = defaultdict(list)
+        for subscription in recipients:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver_on_loop, subscriptions, event)
+            except RuntimeError:
+                # The loop was closed without the streams ending
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+    @staticmethod
+    def _deliver_on_loop(subscriptions, event):
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._by_user)
+
+    def publish_tasks(self, task_ids, created=False, include_subtrees=False):
+        """Publish events for the given tasks once the current transaction commits.
+
+        Soft-deleted tasks are published as deleted, the others as created
+        or updated.
+        """
+        task_ids = [task_id for task_id in task_ids if task_id is not None]
+        if not task_ids:
+            return
+        transaction.on_commit(lambda: self._publish_rows(task_ids, created, include_subtrees))
+
+    def publish_deleted(self, task_id, user_id):
+        """Publish a hard-deleted task; only its owner and administrators are told."""
+        events = [{'type': 'deleted', 'task_ids': [task_id], 'user_id': user_id, 'owner_is_user': False}]
+        transaction.on_commit(lambda: self.backend.publish(self, events))
+
+    def _publish_rows(self, task_ids, created, include_subtrees):
+        if not self.backend.shared and not self.has_subscribers():
+            return
+        related = Q(id__in=task_ids)
+        if include_subtrees:
+            related |= Q(id__in=UserTaskClosure.objects.filter(ancestor_id__in=task_ids).values('descendant_id'))
+        rows = UserTask.objects.all_with_deleted().filter(related).values_list(
+            'id', 'user_id', 'user__role_id', 'is_deleted'
+        )
+
+        user_role_id = role_registry.role_id('user')
+        grouped = defaultdict(list)
+        for task_id, user_id, role_id, is_deleted in rows:
+            event_type = 'deleted' if is_deleted else 'created' if created else 'updated'
+            grouped[(event_type, user_id, role_id is not None and role_id == user_role_id)].append(task_id)
+
+        events = []
+        for (event_type, user_id, owner_is_user), ids in grouped.items():
+            # Keeps NOTIFY payloads well under their 8000 byte limit
+            for start in range(0, len(ids), self.max_ids_per_event):
+                events.append({
+                    'type': event_type,
+                    'task_ids': ids[start:start + self.max_ids_per_event],
+                    'user_id': user_id,
+                    'owner_is_user': owner_is_user,
+                })
+        if events:
+            self.backend.publish(self, events)
+
+    async def stream(self, user_id, scope, expires_at):
+        """Yield server-sent events for one client until its token expires at ``expires_at``."""
+        subscription = self.subscribe(user_id, scope, asyncio.get_running_loop())
+        try:
+            yield 'retry: 5000\nevent: ready\ndata: {}\n\n'
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    # The client reconnects with a refreshed token
+                    yield 'event: expired\ndata: {}\n\n'
+                    return
+                event = await subscription.get(min(self.heartbeat, remaining))
+                if subscription.overflowed:
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    event = {'type': 'resync'}
+                if event is None:
+                    yield ': keepalive\n\n'
+                elif event['type'] == 'resync':
+                    yield 'event: resync\ndata: {}\n\n'
+                else:
+                    yield f'event: tasks\ndata: {json.dumps(event, separators=(",", ":"))}\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+
+task_events = TaskEventBroker()
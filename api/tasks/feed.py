@@ -0,0 +1,174 @@
+"""
+Pre-rendered cache of the public task feed.
+
+Each page of ``/api/tasks/public/`` is stored as its final JSON bytes plus an
+ETag in a Django cache backend (``PUBLIC_FEED_CACHE_ALIAS``), together with
+the key range it covers and the change sequence number read before it was
+rendered.
+
+Every invalidation takes the next number from a shared counter with an
+atomic ``cache.incr`` and logs the changed positions under that number. A
+page is only served if no change logged after its sequence number falls in
+its range, so a task change still drops just the pages showing the task or
+one of its ancestors (ancestors embed the task in their ``subtasks``). No
+key is ever read, modified and written back, so any number of processes
+can share the cache.
+"""
+import bisect
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from .models import UserTask, UserTaskClosure
+
+
+class PublicFeedCache:
+    """Stores rendered public feed pages and invalidates them by key range."""
+    key_prefix = 'tasks:public_feed'
+    # Pages more than this many changes behind are re-rendered rather than checked
+    max_checked_changes = 100
+    # Changes touching more positions are logged as "everything changed"
+    max_logged_positions = 1000
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'PUBLIC_FEED_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'PUBLIC_FEED_CACHE_TIMEOUT', 300)
+
+    @property
+    def sequence_key(self):
+        return f'{self.key_prefix}:sequence'
+
+    def change_key(self, sequence):
+        return f'{self.key_prefix}:change:{sequence}'
+
+    def page_key(self, host, page_size, cursor):
+        """Return the cache key of one page of the feed."""
+        digest = hashlib.sha1(f'{host}|{page_size}|{cursor or ""}'.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:page:{digest}'
+
+    def current_sequence(self):
+        """Return the sequence number of the latest change; read it before rendering a page."""
+        sequence = self.cache.get(self.sequence_key)
+        if sequence is None:
+            # Start from the clock so a counter lost to eviction never
+            # repeats numbers that old pages or change entries still use
+            self.cache.add(self.sequence_key, time.time_ns() // 1000, None)
+            sequence = self.cache.get(self.sequence_key)
+        return sequence
+
+    def _next_sequence(self):
+        try:
+            return self.cache.incr(self.sequence_key)
+        except ValueError:
+            self.current_sequence()
+            return self.cache.incr(self.sequence_key)
+
+    def get_page(self, key):
+        """Return the cached page entry (content, etag) or None if missing or stale."""
+        found = self.cache.get_many([key, self.sequence_key])
+        entry, sequence = found.get(key), found.get(self.sequence_key)
+        if entry is None or sequence is None or sequence < entry['sequence']:
+            return None
+        if sequence == entry['sequence']:
+            return entry
+        if sequence - entry['sequence'] > self.max_checked_changes:
+            return None
+
+        change_keys = [self.change_key(number) for number in range(entry['sequence'] + 1, sequence + 1)]
+        changes = self.cache.get_many(change_keys)
+        for change_key in change_keys:
+            # A missing entry is a change still being logged (or evicted)
+            positions = changes.get(change_key)
+            if positions is None or positions == 'all' or self._covers(entry, positions):
+                return None
+
+        # Nothing since it was rendered touched the page; skip those changes next time
+        entry = dict(entry, sequence=sequence)
+        self.cache.set(key, entry, self.timeout)
+        return entry
+
+    @staticmethod
+    def _covers(entry, positions):
+        """Return whether the page ``entry`` shows one of the sorted ``positions``."""
+        upper, lower = entry['upper'], entry['lower']
+        # First position at or above the page's lower bound
+        start = 0 if lower is None else bisect.bisect_left(positions, lower)
+        return start < len(positions) and (upper is None or positions[start] < upper)
+
+    def store_page(self, key, content, upper, lower, sequence):
+        """Cache rendered page bytes covering the (lower, upper) key range.
+
+        ``upper`` is the exclusive position the page starts after (None for
+        the first page) and ``lower`` the position of its last row (None for
+        the last page). Positions are ``(created_at, id)`` tuples.
+        ``sequence`` is ``current_sequence()`` as read before rendering, so
+        changes committed while the page was rendered still drop it.
+        """
+        entry = {
+            'content': content,
+            'etag': '"%s"' % hashlib.sha1(content).hexdigest(),
+            'upper': upper,
+            'lower': lower,
+            'sequence': sequence,
+        }
+        self.cache.set(key, entry, self.timeout)
+        return entry
+
+    def invalidate_positions(self, positions):
+        """Drop every cached page whose range contains one of ``positions``."""
+        positions = sorted(set(positions))
+        if not positions:
+            return
+        if len(positions) > self.max_logged_positions:
+            positions = 'all'
+        # Log entries outlive every page that was rendered before them
+        self.cache.set(self.change_key(self._next_sequence()), positions, self.timeout)
+
+    def invalidate_tasks(self, task_ids, include_subtrees=False, positions=()):
+        """Drop the pages showing the given tasks, their ancestors and optionally their subtrees.
+
+        Runs after the current transaction commits so the closure table
+        already reflects the change. Extra ``positions`` cover rows that no
+        longer exist (hard deletes).
+        """
+        task_ids = [task_id for task_id in task_ids if task_id is not None]
+        positions = list(positions)
+
+        def invalidate():
+            related = Q(descendant_links__descendant_id__in=task_ids)
+            if include_subtrees:
+                related |= Q(id__in=UserTaskClosure.objects.filter(
+                    ancestor_id__in=task_ids
+                ).values('descendant_id'))
+            self._invalidate_related(related, positions)
+
+        transaction.on_commit(invalidate)
+
+    def invalidate_owners(self, user_ids):
+        """Drop the pages showing tasks of the given users (their name or role changed)."""
+        user_ids = list(user_ids)
+
+        def invalidate():
+            self._invalidate_related(Q(descendant_links__descendant__user_id__in=user_ids))
+
+        transaction.on_commit(invalidate)
+
+    def _invalidate_related(self, related, positions=()):
+        # Nothing can be cached before the first page read the sequence
+        if self.cache.get(self.sequence_key) is None:
+            return
+        related_positions = UserTask.objects.all_with_deleted().filter(related).values_list(
+            'created_at', 'id'
+        ).distinct()[:self.max_logged_positions + 1]
+        self.invalidate_positions(list(positions) + [tuple(position) for position in related_positions])
+
+
+public_feed = PublicFeedCache()
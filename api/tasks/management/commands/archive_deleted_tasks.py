@@ -0,0 +1,109 @@
+"""
+Django management command to archive soft-deleted tasks.
+Moves tasks deleted more than the retention period ago out of user_tasks
+into archived_user_tasks, one short transaction per batch with a pause
+between batches. Runs once (from cron) or, with --loop, keeps running and
+archives every --interval seconds.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections
+from django.utils import timezone
+
+from tasks.archive import ArchiveConflict, archive_candidates, archive_tasks_batch
+
+
+class Command(BaseCommand):
+    help = 'Moves soft-deleted tasks past retention into archived_user_tasks in throttled batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_RETENTION_DAYS', 30),
+            help='Days a deleted task stays restorable in place (default: archive.retention_days)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_BATCH_SIZE', 500),
+            help='Tasks moved per transaction (default: archive.batch_size)',
+        )
+        parser.add_argument(
+            '--delay-ms',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_BATCH_DELAY_MS', 200),
+            help='Pause between batches in milliseconds (default: archive.batch_delay_ms)',
+        )
+        parser.add_argument(
+            '--lock-timeout-ms',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_LOCK_TIMEOUT_MS', 2000),
+            help='Longest wait for a row lock before a batch is retried (default: archive.lock_timeout_ms)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=0,
+            help='Stop a run after this many batches; 0 runs until nothing is left (default: 0)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and archive every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_INTERVAL', 3600),
+            help='Seconds between runs with --loop (default: archive.interval)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the deleted tasks past retention',
+        )
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 0:
+            raise CommandError('--retention-days must not be negative')
+        while True:
+            close_old_connections()
+            cutoff = timezone.now() - timedelta(days=options['retention_days'])
+            if options['dry_run']:
+                self.stdout.write(f'Would archive up to {archive_candidates(cutoff)} tasks deleted before {cutoff:%Y-%m-%d %H:%M}')
+                return
+            self.archive(cutoff, options)
+            if not options['loop']:
+                return
+            time.sleep(max(options['interval'], 1))
+
+    def archive(self, cutoff, options):
+        batch_size = max(options['batch_size'], 1)
+        delay = max(options['delay_ms'], 0) / 1000
+        archived = batches = retries = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            try:
+                moved = archive_tasks_batch(cutoff, batch_size, max(options['lock_timeout_ms'], 1))
+            except (ArchiveConflict, OperationalError) as exc:
+                # Lock timeouts and concurrent restores only cost a retry
+                retries += 1
+                self.stdout.write(self.style.WARNING(f'  Batch rolled back ({exc}); retrying'))
+                if retries > 5:
+                    break
+                time.sleep(delay or 1)
+                continue
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            retries = 0
+            self.stdout.write(f'  Archived {moved} tasks')
+            time.sleep(delay)
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Archived {archived} tasks deleted before {cutoff:%Y-%m-%d %H:%M} ({batches} batches)')
+        )
@@ -0,0 +1,74 @@
+"""
+Django management command to benchmark the query plans of the main endpoint queries.
+Seeds a large synthetic dataset inside a transaction that is rolled back
+afterwards, EXPLAINs each endpoint's main query (see tasks/query_plans.py)
+and reports the indexes the database picks, failing on a sequential scan of
+user_tasks or users. The test suite checks the plans on a small fixture;
+this shows them at a realistic table size.
+Optional, for development and staging databases: the seeding holds the
+transaction open for a while.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import User
+from tasks.query_plans import plan_checks, plan_problem, seed_plan_data
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the main endpoint query plans on a large synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-tasks',
+            type=int,
+            default=200000,
+            help='Synthetic tasks added for the check and rolled back afterwards; 0 checks the data as is '
+                 '(default: 200000)',
+        )
+        parser.add_argument(
+            '--seed-users',
+            type=int,
+            default=20000,
+            help='Synthetic users added alongside the tasks (default: 20000)',
+        )
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Print the full plan of every query',
+        )
+
+    def handle(self, *args, **options):
+        users = {
+            role: User.objects.filter(role__name=role).order_by('id').first()
+            for role in ('administrator', 'moderator', 'user')
+        }
+        if users['user'] is None:
+            raise CommandError('No regular user found; run create_dummy_data first')
+        for role in ('moderator', 'administrator'):
+            if users[role] is None:
+                self.stdout.write(self.style.WARNING(f'  No {role} found; skipping {role} checks'))
+
+        failures = []
+        with transaction.atomic():
+            if options['seed_tasks'] > 0:
+                self.stdout.write(
+                    f'Seeding {max(options["seed_users"], 0)} users and {options["seed_tasks"]} tasks '
+                    '(rolled back afterwards)...'
+                )
+                seed_plan_data(options['seed_tasks'], options['seed_users'], users['user'].role_id)
+            for name, queryset in plan_checks(users):
+                problem, indexes = plan_problem(queryset)
+                if problem:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'  ✗ {name}: {problem}'))
+                else:
+                    self.stdout.write(f'  ✓ {name}: {", ".join(indexes)}')
+                if options['show_plans']:
+                    self.stdout.write(queryset.explain())
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries do not use an index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('✓ Every checked query uses an index'))
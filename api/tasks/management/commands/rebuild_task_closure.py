@@ -0,0 +1,32 @@
+"""
+Django management command to rebuild the task hierarchy closure table.
+Backfills user_task_closure from the parent links stored in user_tasks.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks.models import UserTask, UserTaskClosure
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the user_task_closure hierarchy index from existing user_tasks rows'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding task closure table...')
+
+        with transaction.atomic():
+            row_count = UserTaskClosure.objects.rebuild()
+            cycle_members = UserTaskClosure.objects.cycle_members()
+
+        task_count = UserTask.objects.all_with_deleted().count()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Indexed {task_count} tasks ({row_count} closure rows)')
+        )
+
+        if cycle_members:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Parent links contain a cycle through tasks: '
+                    f'{", ".join(str(task_id) for task_id in sorted(cycle_members))}'
+                )
+            )
@@ -0,0 +1,48 @@
+"""
+Django management command to restore archived tasks.
+Moves the given archived tasks with their archived subtasks, or every
+archived task of a user, back into user_tasks. They come back in the trash
+(soft-deleted) unless --undelete is given; even then, tasks under a task
+that is still deleted stay in the trash.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from tasks.archive import restore_archived_tasks
+
+
+class Command(BaseCommand):
+    help = 'Restores archived tasks and their subtasks into user_tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'task_ids',
+            nargs='*',
+            type=int,
+            help='Archived tasks to restore with their subtasks',
+        )
+        parser.add_argument(
+            '--user',
+            help='Restore every archived task of the user with this email',
+        )
+        parser.add_argument(
+            '--undelete',
+            action='store_true',
+            help='Also undelete the restored tasks instead of leaving them in the trash',
+        )
+
+    def handle(self, *args, **options):
+        if bool(options['task_ids']) == bool(options['user']):
+            raise CommandError('Give either task ids or --user')
+
+        user_id = None
+        if options['user']:
+            user_id = User.objects.all_with_deleted().filter(email=options['user']).values_list('id', flat=True).first()
+            if user_id is None:
+                raise CommandError(f'No user with email {options["user"]}')
+
+        restored, undeleted = restore_archived_tasks(options['task_ids'], user_id=user_id, undelete=options['undelete'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Restored {restored} tasks ({undeleted} live, {restored - undeleted} in the trash)'
+        ))
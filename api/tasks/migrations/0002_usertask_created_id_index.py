@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['created_at', 'id'], name='user_tasks_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_usertask_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Number of parent links between ancestor and descendant')),
+                ('ancestor', models.ForeignKey(db_column='ancestor_id', on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='tasks.usertask')),
+                ('descendant', models.ForeignKey(db_column='descendant_id', on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='tasks.usertask')),
+            ],
+            options={
+                'verbose_name': 'user task closure',
+                'verbose_name_plural': 'user task closures',
+                'db_table': 'user_task_closure',
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        # Backfill from existing parent links (same query as rebuild_task_closure)
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO user_task_closure (ancestor_id, descendant_id, depth)
+                WITH RECURSIVE paths(ancestor_id, descendant_id, depth, path) AS (
+                    SELECT id, id, 0, ARRAY[id] FROM user_tasks
+                    UNION ALL
+                    SELECT p.ancestor_id, t.id, p.depth + 1, p.path || t.id
+                    FROM paths p
+                    JOIN user_tasks t ON t.parent_id = p.descendant_id
+                    WHERE NOT t.id = ANY(p.path)
+                )
+                SELECT ancestor_id, descendant_id, depth FROM paths
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
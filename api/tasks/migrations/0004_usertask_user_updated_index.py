@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_usertaskclosure'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='user_tasks_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # The GIN index is built concurrently so a large user_tasks table stays writable
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_usertask_user_updated_index'),
+    ]
+
+    # Not in the model state: Django 4.2 cannot declare generated columns (see tasks/search.py)
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE user_tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A')
+                    || setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')
+                ) STORED
+            """,
+            reverse_sql='ALTER TABLE user_tasks DROP COLUMN search_vector',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS user_tasks_search_idx ON user_tasks USING gin (search_vector)',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS user_tasks_search_idx',
+        ),
+    ]
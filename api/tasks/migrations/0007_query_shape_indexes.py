@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:06
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so a large user_tasks table stays writable
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0006_archived_tasks'),
+    ]
+
+    # The replacement is built before the full created_at index is dropped
+    operations = [
+        AddIndexConcurrently(
+            model_name='usertask',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='user_tasks_live_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usertask',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'created_at', 'id'], name='user_tasks_user_live_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usertask',
+            index=models.Index(fields=['updated_at', 'id'], name='user_tasks_updated_id_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='usertask',
+            name='user_tasks_created_id_idx',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:17
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_deleted_at(apps, schema_editor):
+    """Date earlier soft deletes by their last update; they keep no deletion_id."""
+    UserTask = apps.get_model('tasks', 'UserTask')
+    UserTask.objects.filter(is_deleted=True, deleted_at__isnull=True).update(deleted_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertask',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usertask',
+            name='deletion_id',
+            field=models.UUIDField(blank=True, help_text='Shared by the tasks soft-deleted together; restoring brings back only those', null=True),
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+    ]
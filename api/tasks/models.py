@@ -1,6 +1,10 @@
-from django.db import models
+import uuid
+
+from django.db import connection, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from accounts.models import User
+from .signals import task_tree_changed
 
 
 class UserTaskManager(models.Manager):
@@ -17,6 +21,59 @@ class UserTaskManager(models.Manager):
     def only_deleted(self):
         """Return only deleted tasks."""
         return super().get_queryset().filter(is_deleted=True)
+    
+    def visible_descendants(self, root_ids):
+        """Return all non-deleted descendants of the given tasks in one query."""
+        descendant_ids = UserTaskClosure.objects.filter(
+            ancestor_id__in=list(root_ids),
+            depth__gt=0
+        ).values('descendant_id')
+        return self.get_queryset().filter(id__in=descendant_ids)
+    
+    def soft_delete_subtrees(self, root_ids):
+        """Soft delete the given tasks and all their descendants.
+        
+        Runs as a single UPDATE over the closure table and returns the number
+        of tasks that were deleted. The deleted rows share one ``deletion_id``
+        so restore_subtrees() can bring back exactly this deletion.
+        """
+        root_ids = list(root_ids)
+        subtree_ids = UserTaskClosure.objects.filter(ancestor_id__in=root_ids).values('descendant_id')
+        now = timezone.now()
+        with transaction.atomic():
+            deleted_count = self.get_queryset().filter(id__in=subtree_ids).update(
+                is_deleted=True,
+                deleted_at=now,
+                deletion_id=uuid.uuid4(),
+                updated_at=now
+            )
+            task_tree_changed.send(sender=self.model, task_ids=root_ids)
+        return deleted_count
+    
+    def restore_subtrees(self, root_ids):
+        """Restore the given soft-deleted tasks and the descendants deleted with them.
+        
+        Descendants that were deleted on their own before (another
+        ``deletion_id``) stay deleted. Returns the number of tasks that were
+        restored.
+        """
+        root_ids = list(root_ids)
+        subtree_ids = UserTaskClosure.objects.filter(
+            Q(descendant__deletion_id=F('ancestor__deletion_id'))
+            # Rows deleted before deletions were recorded restore as a whole
+            | Q(ancestor__deletion_id__isnull=True, descendant__deletion_id__isnull=True),
+            ancestor_id__in=root_ids,
+            ancestor__is_deleted=True
+        ).values('descendant_id')
+        with transaction.atomic():
+            restored_count = self.only_deleted().filter(id__in=subtree_ids).update(
+                is_deleted=False,
+                deleted_at=None,
+                deletion_id=None,
+                updated_at=timezone.now()
+            )
+            task_tree_changed.send(sender=self.model, task_ids=root_ids)
+        return restored_count
 
 
 class UserTask(models.Model):
@@ -40,6 +97,12 @@ class UserTask(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    deletion_id = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text='Shared by the tasks soft-deleted together; restoring brings back only those'
+    )
     
     objects = UserTaskManager()
     
@@ -48,21 +111,236 @@ class UserTask(models.Model):
         ordering = ['-created_at']
         verbose_name = 'user task'
         verbose_name_plural = 'user tasks'
+        # The live-task indexes are partial: the default manager always
+        # filters out soft-deleted rows (see tasks/query_plans.py)
+        indexes = [
+            # Keyset pagination key, see tasks.pagination.TaskCursorPagination
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_deleted=False),
+                name='user_tasks_live_created_idx'
+            ),
+            # One user's task list, newest first
+            models.Index(
+                fields=['user', 'created_at', 'id'],
+                condition=models.Q(is_deleted=False),
+                name='user_tasks_user_live_idx'
+            ),
+            # Delta sync of one user's tasks, see tasks.views.TaskSyncView
+            models.Index(fields=['user', 'updated_at', 'id'], name='user_tasks_user_updated_idx'),
+            # Delta sync of moderators and administrators across users, and
+            # soft-deleted tasks past retention (see tasks.archive)
+            models.Index(fields=['updated_at', 'id'], name='user_tasks_updated_id_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded parent so save() can detect moves."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Save the task and keep the closure table in sync with its parent."""
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        moved = (
+            not adding
+            and self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id)
+            and (update_fields is None or {'parent', 'parent_id'} & set(update_fields))
+        )
+        
+        with transaction.atomic():
+            if moved and self.parent_id is not None and self.is_ancestor_of(self.parent_id):
+                raise ValueError('A task cannot be moved under itself or one of its subtasks.')
+            super().save(*args, **kwargs)
+            if adding:
+                UserTaskClosure.objects.insert_nodes([(self.pk, self.parent_id)])
+            elif moved:
+                UserTaskClosure.objects.move_subtree(self.pk, self.parent_id)
+        
+        self._loaded_parent_id = self.parent_id
+    
     def soft_delete(self):
-        """Soft delete the task."""
+        """Soft delete the task with its subtree; return the number of deleted tasks."""
+        deleted_count = UserTask.objects.soft_delete_subtrees([self.pk])
         self.is_deleted = True
-        self.save()
+        return deleted_count
+    
+    def restore(self):
+        """Restore the task with its subtree; return the number of restored tasks."""
+        restored_count = UserTask.objects.restore_subtrees([self.pk])
+        self.is_deleted = False
+        return restored_count
+    
+    def get_descendants(self):
+        """Return all non-deleted tasks below this one."""
+        return UserTask.objects.filter(ancestor_links__ancestor=self, ancestor_links__depth__gt=0)
+    
+    def get_ancestors(self):
+        """Return all tasks above this one, root first."""
+        return UserTask.objects.all_with_deleted().filter(
+            descendant_links__descendant=self,
+            descendant_links__depth__gt=0
+        ).order_by('-descendant_links__depth')
+    
+    def get_subtree_count(self):
+        """Return the number of non-deleted tasks below this one."""
+        return UserTaskClosure.objects.filter(
+            ancestor=self,
+            depth__gt=0,
+            descendant__is_deleted=False
+        ).count()
+    
+    def is_ancestor_of(self, task_id):
+        """Return True if the given task is this task or lies below it."""
+        return UserTaskClosure.objects.filter(ancestor_id=self.pk, descendant_id=task_id).exists()
     
     def get_all_subtasks(self):
-        """Recursively get all subtasks."""
-        subtasks = list(self.subtasks.filter(is_deleted=False))
-        for subtask in subtasks:
-            subtasks.extend(subtask.get_all_subtasks())
-        return subtasks
+        """Get all subtasks at any depth."""
+        return list(self.get_descendants())
+
+
+class UserTaskClosureManager(models.Manager):
+    """Manager with set-based maintenance operations for the closure table."""
+    
+    def insert_nodes(self, nodes):
+        """Add closure rows for new tasks given as (id, parent_id) pairs.
+        
+        Parents must already have their own closure rows.
+        """
+        if not nodes:
+            return
+        ids = [node_id for node_id, _ in nodes]
+        parent_ids = [parent_id for _, parent_id in nodes]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO user_task_closure (ancestor_id, descendant_id, depth)
+                SELECT n.id, n.id, 0 FROM unnest(%s::bigint[]) AS n(id)
+                UNION ALL
+                SELECT c.ancestor_id, n.id, c.depth + 1
+                FROM unnest(%s::bigint[], %s::bigint[]) AS n(id, parent_id)
+                JOIN user_task_closure c ON c.descendant_id = n.parent_id
+                """,
+                [ids, ids, parent_ids]
+            )
+    
+    def move_subtree(self, node_id, new_parent_id):
+        """Re-link the subtree rooted at ``node_id`` under ``new_parent_id``."""
+        with connection.cursor() as cursor:
+            # Drop every path from the old ancestors into the subtree
+            cursor.execute(
+                """
+                DELETE FROM user_task_closure
+                WHERE descendant_id IN (
+                    SELECT descendant_id FROM user_task_closure WHERE ancestor_id = %s
+                )
+                AND ancestor_id IN (
+                    SELECT ancestor_id FROM user_task_closure
+                    WHERE descendant_id = %s AND ancestor_id <> %s
+                )
+                """,
+                [node_id, node_id, node_id]
+            )
+            if new_parent_id is None:
+                return
+            # Connect every ancestor of the new parent to every subtree node
+            cursor.execute(
+                """
+                INSERT INTO user_task_closure (ancestor_id, descendant_id, depth)
+                SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+                FROM user_task_closure above
+                CROSS JOIN user_task_closure below
+                WHERE above.descendant_id = %s AND below.ancestor_id = %s
+                """,
+                [new_parent_id, node_id]
+            )
+    
+    def rebuild(self):
+        """Rebuild the whole table from user_tasks.parent_id; return the row count."""
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE user_task_closure')
+            # The path array stops the walk if the parent links contain a cycle
+            cursor.execute(
+                """
+                INSERT INTO user_task_closure (ancestor_id, descendant_id, depth)
+                WITH RECURSIVE paths(ancestor_id, descendant_id, depth, path) AS (
+                    SELECT id, id, 0, ARRAY[id] FROM user_tasks
+                    UNION ALL
+                    SELECT p.ancestor_id, t.id, p.depth + 1, p.path || t.id
+                    FROM paths p
+                    JOIN user_tasks t ON t.parent_id = p.descendant_id
+                    WHERE NOT t.id = ANY(p.path)
+                )
+                SELECT ancestor_id, descendant_id, depth FROM paths
+                """
+            )
+            return cursor.rowcount
+    
+    def cycle_members(self):
+        """Return ids of tasks whose parent links form a cycle."""
+        # A cycle member A has a descendant D that is also one of its ancestors
+        return list(
+            self.filter(
+                depth__gt=0,
+                ancestor__ancestor_links__ancestor_id=models.F('descendant_id')
+            ).values_list('ancestor_id', flat=True).distinct()
+        )
+
+
+class UserTaskClosure(models.Model):
+    """Closure table for the UserTask hierarchy.
+    
+    Holds one row per (ancestor, descendant) pair, including a depth 0 row
+    linking every task to itself, so subtree and ancestor lookups are single
+    indexed queries.
+    """
+    ancestor = models.ForeignKey(UserTask, on_delete=models.CASCADE, related_name='descendant_links', db_column='ancestor_id')
+    descendant = models.ForeignKey(UserTask, on_delete=models.CASCADE, related_name='ancestor_links', db_column='descendant_id')
+    depth = models.PositiveIntegerField(help_text='Number of parent links between ancestor and descendant')
+    
+    objects = UserTaskClosureManager()
+    
+    class Meta:
+        db_table = 'user_task_closure'
+        verbose_name = 'user task closure'
+        verbose_name_plural = 'user task closures'
+        unique_together = [['ancestor', 'descendant']]
+    
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class ArchivedTask(models.Model):
+    """A soft-deleted task moved out of user_tasks by the archive job (see tasks/archive.py).
+    
+    Keeps the original id, parent id and deletion (deleted_at, deletion_id)
+    so archived subtrees can be restored to the trash as they were.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks', db_column='user_id')
+    parent_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=UserTask.TaskStatus.choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(help_text='When the task was deleted')
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    deletion_id = models.UUIDField(null=True, blank=True, help_text='deletion_id of the task in user_tasks')
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        db_table = 'archived_user_tasks'
+        ordering = ['-archived_at']
+        verbose_name = 'archived task'
+        verbose_name_plural = 'archived tasks'
+    
+    def __str__(self):
+        return self.title
 
 
 # Keep Task as an alias for backward compatibility during migration
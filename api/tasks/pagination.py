@@ -0,0 +1,227 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are addressed by an opaque cursor that encodes the ordering key of the
+last row on the previous page, so fetching page N costs the same index range
+scan as page 1 (no OFFSET).
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique composite ordering key.
+
+    The ordering defaults to ``('-created_at', '-id')`` which matches the
+    ``UserTask`` model ordering; views can override it with a
+    ``keyset_ordering`` attribute. The last field must be unique (the primary
+    key) so that every row has a distinct position.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of results starting after the requested cursor."""
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        self.cursor = request.query_params.get(self.cursor_query_param)
+
+        self.position = position = self.decode_cursor(self.cursor, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+        queryset = queryset.order_by(*self.ordering)
+
+        # Fetch one extra row to learn whether a next page exists
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor returned as next_cursor by the previous page.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Number of results per page (max {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def get_ordering(self, view):
+        """Return the ordering tuple, allowing views to override it."""
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at max_page_size."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_position_filter(self, position):
+        """Build a filter selecting rows strictly after ``position``.
+
+        For ``(-created_at, -id)`` this is
+        ``created_at <= c AND (created_at < c OR (created_at = c AND id < i))``.
+        The leading range condition is redundant but lets the planner turn
+        it into an index bound instead of filtering from the start of the index.
+        """
+        fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        first_name, first_desc = fields[0]
+        bound = Q(**{f"{first_name}__{'lte' if first_desc else 'gte'}": position[0]})
+
+        after = Q()
+        for index, (name, descending) in enumerate(fields):
+            condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": position[index]})
+            for prev_index in range(index):
+                condition &= Q(**{fields[prev_index][0]: position[prev_index]})
+            after |= condition
+        return bound & after
+
+    def get_position(self, instance):
+        """Return the ordering key values of ``instance``."""
+        return [getattr(instance, name.lstrip('-')) for name in self.ordering]
+
+    def encode_cursor(self, instance):
+        return self.encode_position(self.get_position(instance))
+
+    def encode_position(self, position):
+        values = []
+        for value in position:
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        """Decode ``cursor`` into typed ordering key values, or None."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [self.to_python(model, name.lstrip('-'), value) for name, value in zip(self.ordering, values)]
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, model, name, value):
+        """Convert a cursor value back to the type of its ordering key."""
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations in orderings are scores, such as the search rank
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError
+            return value
+        return field.to_python(value)
+
+
+class TaskCursorPagination(KeysetPagination):
+    """Cursor pagination for task lists, newest first."""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+
+
+class TaskSearchPagination(KeysetPagination):
+    """Cursor pagination for task search results, best match first."""
+    ordering = ('-search_rank', '-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+
+
+class UserCursorPagination(KeysetPagination):
+    """Cursor pagination for the administrator user directory, newest first."""
+    ordering = ('-date_joined', '-id')
+    page_size = 50
+    max_page_size = 200
+
+
+class TaskSyncPagination(KeysetPagination):
+    """Keyset over ``(updated_at, id)`` for delta sync; the cursor is the client's watermark.
+
+    updated_at is set when a row is written, not when its transaction
+    commits, so a row may become visible after later ones were already
+    synced. Once the last page is served the watermark therefore falls back
+    to a checkpoint ``commit_lag`` in the past; rows changed since then are
+    sent again on the next sync, which clients apply idempotently.
+    """
+    ordering = ('updated_at', 'id')
+    page_size = 500
+    max_page_size = 1000
+    cursor_query_param = 'since'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Invalid watermark'
+    commit_lag = timedelta(seconds=5)
+
+    def decode_cursor(self, cursor, model):
+        """Decode the watermark, rejecting ones older than the task archive retention.
+
+        Tombstones of tasks archived since then are gone, so such clients
+        must reload the list instead of syncing.
+        """
+        position = super().decode_cursor(cursor, model)
+        retention = timedelta(days=getattr(settings, 'TASK_ARCHIVE_RETENTION_DAYS', 30))
+        if position is not None and position[0] < timezone.now() - retention:
+            raise NotFound('Watermark expired')
+        return position
+
+    def checkpoint(self):
+        """Return a watermark before every change that may still be uncommitted."""
+        return self.encode_position([timezone.now() - self.commit_lag, 0])
+
+    def get_watermark(self):
+        """Return the watermark to sync from next."""
+        return self.next_cursor if self.has_next else self.checkpoint()
@@ -1,5 +1,23 @@
+from django.db import models
 from rest_framework import permissions
-from accounts.models import User, Role
+from accounts.models import User
+from accounts.roles import role_registry
+
+
+def filter_visible_tasks(user, queryset):
+    """Restrict a task queryset to the tasks ``user`` may see and manage.
+    
+    Administrators see every task, moderators see tasks of regular users and
+    their own, and users see only their own tasks: the set-wise form of
+    IsTaskOwnerOrModeratorOrAdmin.
+    """
+    if user.is_administrator():
+        return queryset
+    if user.is_moderator():
+        user_role_id = role_registry.role_id('user')
+        if user_role_id:
+            return queryset.filter(models.Q(user__role_id=user_role_id) | models.Q(user_id=user.id))
+    return queryset.filter(user_id=user.id)
 
 
 class IsTaskOwnerOrModeratorOrAdmin(permissions.BasePermission):
@@ -15,15 +33,14 @@ class IsTaskOwnerOrModeratorOrAdmin(permissions.BasePermission):
         
         # Allow moderators to perform actions on user tasks and their own tasks
         if user.is_moderator():
-            user_role = Role.objects.filter(name='user').first()
-            if user_role and obj.user.role == user_role:
+            if obj.user.role_id is not None and obj.user.role_id == role_registry.role_id('user'):
                 return True
             # Also allow moderators to edit their own tasks
-            if obj.user == user:
+            if obj.user_id == user.id:
                 return True
         
         # Allow users to perform actions on their own tasks
-        if obj.user == user:
+        if obj.user_id == user.id:
             return True
         
         return False
@@ -0,0 +1,128 @@
+"""
+Query plan checks of the main endpoint queries.
+
+``plan_checks`` builds each endpoint's main query the way the view does and
+``plan_problem`` EXPLAINs one, reporting sequential scans of user_tasks or
+users and whether an index was used at all. The tests run them against a
+small seeded fixture; ``manage.py check_query_plans`` runs them against a
+large synthetic dataset as an optional benchmark.
+"""
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from .models import UserTask
+from .pagination import TaskCursorPagination, TaskSyncPagination
+from .permissions import filter_visible_tasks
+from .search import search_tasks
+
+CHECKED_TABLES = ('user_tasks', 'users')
+INDEX_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+SEED_USERS_SQL = """
+    INSERT INTO users (
+        password, is_superuser, email, name, surname, patronym, full_name, birth_place, is_active,
+        account_status, is_staff, date_joined, role_id, token_version, login_count
+    )
+    SELECT '!', false, 'plan-seed-' || g || '@example.invalid', 'Seed', 'User ' || g, '', 'User ' || g || ' Seed', '',
+        false, CASE WHEN g %% 10 = 0 THEN 'deleted' ELSE 'active' END, false,
+        now() - g * interval '1 minute', %s, 0, 0
+    FROM generate_series(1, %s) g
+"""
+
+# Spread over every user, one in twenty soft-deleted; closure rows are the
+# depth 0 self links only (every seeded task is top-level)
+SEED_TASKS_SQL = """
+    WITH owners AS (SELECT array_agg(id) AS ids FROM users),
+    seeded AS (
+        INSERT INTO user_tasks (title, description, user_id, parent_id, status, created_at, updated_at, is_deleted)
+        SELECT 'Seed task ' || md5(g::text), 'Seeded description ' || md5((g * 7)::text),
+            owners.ids[1 + g %% cardinality(owners.ids)], NULL, 'pending',
+            now() - g * interval '1 second', now() - g * interval '1 second', g %% 20 = 0
+        FROM generate_series(1, %s) g, owners
+        RETURNING id
+    )
+    INSERT INTO user_task_closure (ancestor_id, descendant_id, depth)
+    SELECT id, id, 0 FROM seeded
+"""
+
+
+def seed_plan_data(task_count, user_count, role_id):
+    """Insert synthetic users (with ``role_id``) and top-level tasks, then ANALYZE the tables."""
+    with connection.cursor() as cursor:
+        if user_count > 0:
+            cursor.execute(SEED_USERS_SQL, [role_id, user_count])
+        if task_count > 0:
+            cursor.execute(SEED_TASKS_SQL, [task_count])
+        for table in CHECKED_TABLES + ('user_task_closure',):
+            cursor.execute(f'ANALYZE {table}')
+
+
+def plan_nodes(plan):
+    """Yield ``plan`` and every node below it."""
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def plan_checks(users, window=timedelta(hours=1)):
+    """Return (name, queryset) pairs built the way the endpoints build them.
+
+    ``users`` maps the role names administrator, moderator and user to a user
+    of that role; checks of a missing role (None) are left out. Next pages and
+    delta syncs continue from ``window`` ago.
+    """
+    now = timezone.now()
+    user = users['user']
+    live = UserTask.objects.all()
+    position = [now - window, 0]
+    cursor_filter = TaskCursorPagination().get_position_filter(position)
+    sync_filter = TaskSyncPagination().get_position_filter(position)
+    page_ids = list(filter_visible_tasks(user, live).order_by('-created_at', '-id').values_list('id', flat=True)[:50])
+
+    checks = [
+        ('public feed', live.order_by('-created_at', '-id')[:51]),
+        ('public feed, next page', live.filter(cursor_filter).order_by('-created_at', '-id')[:51]),
+        ('task list (user)', filter_visible_tasks(user, live).order_by('-created_at', '-id')[:51]),
+        ('task list (user), next page',
+         filter_visible_tasks(user, live).filter(cursor_filter).order_by('-created_at', '-id')[:51]),
+        ('subtask trees of a page', UserTask.objects.visible_descendants(page_ids).order_by('-created_at', '-id')),
+        ('task search (user)',
+         search_tasks(filter_visible_tasks(user, live), 'abc').order_by('-search_rank', '-created_at', '-id')[:51]),
+        ('delta sync (user)',
+         filter_visible_tasks(user, UserTask.objects.all_with_deleted()).filter(sync_filter)
+         .order_by('updated_at', 'id')[:501]),
+        ('archive candidates', UserTask.objects.only_deleted().filter(updated_at__lt=now - timedelta(days=30))),
+        ('login lookup', User.objects.all_with_deleted().filter(email=user.email)),
+        ('registration email check', User.objects.all_with_deleted().filter(email=user.email, account_status='active')),
+        ('user directory', User.objects.select_related('role').order_by('-date_joined', '-id')[:51]),
+    ]
+    for role in ('moderator', 'administrator'):
+        if users.get(role) is None:
+            continue
+        checks += [
+            (f'task list ({role})', filter_visible_tasks(users[role], live).order_by('-created_at', '-id')[:51]),
+            (f'delta sync ({role})',
+             filter_visible_tasks(users[role], UserTask.objects.all_with_deleted()).filter(sync_filter)
+             .order_by('updated_at', 'id')[:501]),
+        ]
+    return checks
+
+
+def plan_problem(queryset):
+    """EXPLAIN ``queryset``; return (problem or None, names of the indexes used)."""
+    plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+    nodes = list(plan_nodes(plan))
+    seq_scans = sorted({
+        node['Relation Name'] for node in nodes
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in CHECKED_TABLES
+    })
+    indexes = sorted({node['Index Name'] for node in nodes if node['Node Type'] in INDEX_NODES})
+    if seq_scans:
+        return f'Seq Scan on {", ".join(seq_scans)}', indexes
+    if not indexes:
+        return 'no index used', indexes
+    return None, indexes
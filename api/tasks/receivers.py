@@ -0,0 +1,78 @@
+"""
+Signal receivers keeping derived task data (the public feed cache) in sync
+and publishing task changes to the event streams.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.signals import users_changed
+
+from .events import task_events
+from .feed import public_feed
+from .models import UserTask
+from .signals import task_tree_changed, tasks_changed
+
+
+@receiver(post_save, sender=UserTask)
+def invalidate_feed_on_save(sender, instance, **kwargs):
+    """Drop feed pages showing the saved task, its old and its new ancestors."""
+    public_feed.invalidate_tasks(
+        [instance.pk, instance.parent_id, getattr(instance, '_loaded_parent_id', None)],
+        positions=[(instance.created_at, instance.pk)]
+    )
+
+
+@receiver(post_delete, sender=UserTask)
+def invalidate_feed_on_delete(sender, instance, **kwargs):
+    """Drop feed pages that showed a hard-deleted task."""
+    public_feed.invalidate_tasks([instance.parent_id], positions=[(instance.created_at, instance.pk)])
+
+
+@receiver(task_tree_changed, sender=UserTask)
+def invalidate_feed_on_tree_change(sender, task_ids, **kwargs):
+    """Drop feed pages showing any task of the changed subtrees."""
+    public_feed.invalidate_tasks(task_ids, include_subtrees=True)
+
+
+@receiver(tasks_changed, sender=UserTask)
+def invalidate_feed_on_bulk_change(sender, task_ids, **kwargs):
+    """Drop feed pages showing any of the bulk created or updated tasks."""
+    public_feed.invalidate_tasks(task_ids)
+
+
+@receiver(post_save, sender=User)
+def invalidate_feed_on_owner_save(sender, instance, created, **kwargs):
+    """Drop feed pages showing tasks of a user whose name, email or role changed."""
+    if not created and instance.task_owner_fields_changed():
+        public_feed.invalidate_owners([instance.pk])
+
+
+@receiver(users_changed, sender=User)
+def invalidate_feed_on_owner_change(sender, user_ids, **kwargs):
+    """Drop feed pages showing tasks of the bulk changed users."""
+    public_feed.invalidate_owners(user_ids)
+
+
+@receiver(post_save, sender=UserTask)
+def publish_event_on_save(sender, instance, created, **kwargs):
+    """Tell the streams about the saved task."""
+    task_events.publish_tasks([instance.pk], created=created)
+
+
+@receiver(post_delete, sender=UserTask)
+def publish_event_on_delete(sender, instance, **kwargs):
+    """Tell the streams about a hard-deleted task."""
+    task_events.publish_deleted(instance.pk, instance.user_id)
+
+
+@receiver(task_tree_changed, sender=UserTask)
+def publish_events_on_tree_change(sender, task_ids, **kwargs):
+    """Tell the streams about every task of the soft-deleted or restored subtrees."""
+    task_events.publish_tasks(task_ids, include_subtrees=True)
+
+
+@receiver(tasks_changed, sender=UserTask)
+def publish_events_on_bulk_change(sender, task_ids, created=False, **kwargs):
+    """Tell the streams about the bulk created or updated tasks."""
+    task_events.publish_tasks(task_ids, created=created)
@@ -0,0 +1,53 @@
+"""
+Full-text search over task titles and descriptions.
+
+``user_tasks.search_vector`` is a stored generated tsvector column (title
+weighted A, description B) with a GIN index, both created in migration
+0005. Django 4.2 has no generated fields, so the column is not a model field
+(inserts would try to write it); queries reach it through TaskSearchVector.
+
+Search text is split into words that must all match as prefixes, so
+"doc upd" finds "Update documentation". The ``simple`` configuration
+neither stems nor drops stop words, which keeps prefix matches predictable
+for any language; it must match the one in the migration for the index to
+be used.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import Expression, FloatField, Value
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'simple'
+MAX_SEARCH_TERMS = 8
+_SEARCH_TERM = re.compile(r'[^\W_]+')
+
+
+class TaskSearchVector(Expression):
+    """The search_vector column of the queried user_tasks table."""
+    output_field = SearchVectorField()
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        return f'{compiler.quote_name_unless_alias(alias)}.{connection.ops.quote_name("search_vector")}', []
+
+
+def build_search_query(text):
+    """Return a prefix-matching SearchQuery for ``text``, or None if it has no words."""
+    terms = _SEARCH_TERM.findall(text.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    # Terms are letters and digits only, so they need no tsquery quoting
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+
+
+def search_tasks(queryset, text):
+    """Filter ``queryset`` to tasks matching ``text`` and annotate their ``search_rank``."""
+    query = build_search_query(text)
+    if query is None:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+    # ts_rank() returns a real; as double precision the rank survives the
+    # round trip through a pagination cursor exactly
+    return queryset.alias(search_document=TaskSearchVector()).filter(search_document=query).annotate(
+        search_rank=Cast(SearchRank(TaskSearchVector(), query), FloatField())
+    )
@@ -20,6 +20,13 @@ class UserTaskSerializer(serializers.ModelSerializer):
                   'status', 'subtasks', 'created_at', 'updated_at', 'is_deleted')
         read_only_fields = ('id', 'user', 'user_info', 'created_at', 'updated_at', 'is_deleted', 'subtasks')
     
+    def validate(self, attrs):
+        """Reject moves that would put a task under itself or its subtasks."""
+        parent = attrs.get('parent')
+        if parent is not None and self.instance is not None and self.instance.is_ancestor_of(parent.id):
+            raise serializers.ValidationError({'parent_id': 'A task cannot be moved under itself or one of its subtasks.'})
+        return attrs
+    
     def get_user_info(self, obj):
         """Return user information."""
         return {
@@ -30,9 +37,58 @@ class UserTaskSerializer(serializers.ModelSerializer):
         }
     
     def get_subtasks(self, obj):
-        """Return nested subtasks."""
-        subtasks = obj.subtasks.filter(is_deleted=False)
-        return UserTaskSerializer(subtasks, many=True).data
+        """Return nested subtasks, from the preloaded subtask map when present."""
+        subtask_map = self.context.get('subtask_map')
+        if subtask_map is not None:
+            subtasks = subtask_map.get(obj.id, [])
+        else:
+            subtasks = obj.subtasks.filter(is_deleted=False).select_related('user__role')
+        return UserTaskSerializer(subtasks, many=True, context=self.context).data
+
+
+class TaskSyncSerializer(UserTaskSerializer):
+    """Flat task rows for delta sync; clients rebuild the tree from parent_id."""
+    subtasks = None
+    
+    class Meta(UserTaskSerializer.Meta):
+        fields = tuple(field for field in UserTaskSerializer.Meta.fields if field != 'subtasks')
+
+
+class TaskBatchFieldsSerializer(serializers.ModelSerializer):
+    """Validates the plain fields of one batch create or update operation."""
+    
+    class Meta:
+        model = UserTask
+        fields = ('title', 'description', 'status')
+
+
+class TaskBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of task operations."""
+    operations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=500
+    )
+
+
+def build_subtask_map(tasks):
+    """Load every visible descendant of ``tasks`` and group them by parent id.
+    
+    Descendants and their owners/roles are fetched in a single query, so a
+    whole page of task trees serializes without per-node queries.
+    """
+    root_ids = [task.id for task in tasks]
+    subtask_map = {}
+    if not root_ids:
+        return subtask_map
+    descendants = (
+        UserTask.objects.visible_descendants(root_ids)
+        .select_related('user__role')
+        .order_by('-created_at', '-id')
+    )
+    for task in descendants:
+        subtask_map.setdefault(task.parent_id, []).append(task)
+    return subtask_map
 
 
 # Keep TaskSerializer as alias for backward compatibility
@@ -0,0 +1,13 @@
+"""
+Custom task signals.
+"""
+from django.dispatch import Signal
+
+# Sent after set-based writes that bypass Model.save() (subtree soft delete
+# and restore). Arguments: ``task_ids`` - roots of the affected subtrees.
+task_tree_changed = Signal()
+
+# Sent after bulk writes of task rows (batch create and update) that bypass
+# Model.save(). Arguments: ``task_ids`` - the created or updated tasks;
+# ``created`` - true when they were all created (default: false).
+tasks_changed = Signal()
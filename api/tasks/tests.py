@@ -0,0 +1,232 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Role, User
+from .archive import archive_tasks_batch, restore_archived_tasks
+from .batch import TaskBatch
+from .models import ArchivedTask, UserTask, UserTaskClosure
+from .query_plans import plan_checks, plan_problem, seed_plan_data
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class TaskListQueryCountTests(TestCase):
+    """Serializing a page of task trees costs the same queries at any depth or page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='user')
+        cls.user = User.objects.create_user('owner@example.com', 'secret-password', name='Task', surname='Owner', role=role)
+
+    def setUp(self):
+        # Every request must render its page instead of reading the feed cache
+        caches['default'].clear()
+
+    def create_trees(self, roots, depth, children=2):
+        """Create ``roots`` top-level tasks, each with ``children`` subtasks per level down to ``depth``.
+
+        The feed lists every task newest first; the roots are dated last so
+        they fill the first page.
+        """
+        level = [
+            UserTask.objects.create(title=f'Root {index}', user=self.user, created_at=timezone.now() + timedelta(days=1))
+            for index in range(roots)
+        ]
+        for current_depth in range(1, depth + 1):
+            level = [
+                UserTask.objects.create(title=f'Task {current_depth}.{index}', user=self.user, parent=parent)
+                for parent in level
+                for index in range(children)
+            ]
+
+    def count_page_queries(self, page_size):
+        """Return the number of queries of one public feed page and its response body."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/public/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_page_queries_do_not_grow_with_depth(self):
+        self.create_trees(roots=3, depth=1)
+        shallow_queries, _ = self.count_page_queries(page_size=3)
+
+        UserTask.objects.all_with_deleted().delete()
+        self.create_trees(roots=3, depth=4)
+        caches['default'].clear()
+        deep_queries, body = self.count_page_queries(page_size=3)
+
+        self.assertEqual(deep_queries, shallow_queries)
+        # The whole tree was serialized, four levels below each root
+        node = body['results'][0]
+        for _ in range(4):
+            self.assertEqual(len(node['subtasks']), 2)
+            node = node['subtasks'][0]
+        self.assertEqual(node['subtasks'], [])
+
+    def test_page_queries_do_not_grow_with_page_size(self):
+        self.create_trees(roots=20, depth=3)
+        small_queries, small_body = self.count_page_queries(page_size=2)
+        caches['default'].clear()
+        large_queries, large_body = self.count_page_queries(page_size=20)
+
+        self.assertEqual(large_queries, small_queries)
+        self.assertEqual(len(small_body['results']), 2)
+        # Roots and their subtasks both come back: only the page query and
+        # the subtask query run, whatever is on the page
+        self.assertEqual(len(large_body['results']), 20)
+        with self.assertNumQueries(2):
+            caches['default'].clear()
+            self.client.get('/api/tasks/public/', {'page_size': 20})
+
+
+class TaskBatchTests(TestCase):
+    """Checks of batch operations against each other."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='user')
+        cls.user = User.objects.create_user('batcher@example.com', 'secret-password', name='Batch', surname='Owner', role=role)
+        cls.root = UserTask.objects.create(title='Root', user=cls.user)
+        cls.child = UserTask.objects.create(title='Child', user=cls.user, parent=cls.root)
+
+    def test_create_under_a_parent_deleted_in_the_same_batch_fails(self):
+        results = TaskBatch(self.user, [
+            {'op': 'delete', 'id': self.root.id},
+            {'op': 'create', 'title': 'Under root', 'parent_id': self.root.id},
+            {'op': 'create', 'title': 'Under child', 'parent_id': self.child.id},
+        ]).apply()
+
+        self.assertTrue(results[0]['success'])
+        for result in results[1:]:
+            self.assertFalse(result['success'])
+            self.assertIn('parent_id', result['error'])
+        self.assertFalse(UserTask.objects.all_with_deleted().filter(title__startswith='Under').exists())
+
+    def test_unknown_tasks_fail_with_a_detail_error(self):
+        results = TaskBatch(self.user, [
+            {'op': 'update', 'id': 999999, 'title': 'Missing'},
+            {'op': 'delete', 'id': 999998},
+        ]).apply()
+
+        self.assertEqual([result['error'] for result in results], [{'detail': 'Not found.'}] * 2)
+
+    def test_parent_ids_must_be_task_ids(self):
+        parent_ids = [True, str(self.root.id), float(self.root.id)]
+        results = TaskBatch(self.user, [
+            {'op': 'create', 'title': 'Odd parent', 'parent_id': parent_id} for parent_id in parent_ids
+        ]).apply()
+
+        self.assertEqual(
+            [result['error'] for result in results],
+            [{'parent_id': f'Invalid pk "{parent_id}" - object does not exist.'} for parent_id in parent_ids]
+        )
+        self.assertFalse(UserTask.objects.filter(title='Odd parent').exists())
+
+
+class TaskArchiveTests(TestCase):
+    """Archived subtrees come back with their closure rows and deletions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='user')
+        cls.user = User.objects.create_user('archiver@example.com', 'secret-password', name='Archive', surname='Owner', role=role)
+
+    def setUp(self):
+        self.parent = UserTask.objects.create(title='Parent', user=self.user)
+        self.root = UserTask.objects.create(title='Root', user=self.user, parent=self.parent)
+        self.child = UserTask.objects.create(title='Child', user=self.user, parent=self.root)
+        self.grandchild = UserTask.objects.create(title='Grandchild', user=self.user, parent=self.child)
+        # The grandchild goes to the trash on its own before the rest
+        self.grandchild.soft_delete()
+        self.root.soft_delete()
+        self.tasks = [self.root, self.child, self.grandchild]
+        self.deletions = self.deletion_state()
+
+    def deletion_state(self):
+        return {
+            task.id: (task.deleted_at, task.deletion_id)
+            for task in UserTask.objects.all_with_deleted().filter(id__in=[task.id for task in self.tasks])
+        }
+
+    def archive(self):
+        self.assertEqual(archive_tasks_batch(timezone.now() + timedelta(minutes=1), batch_size=100), 3)
+        self.assertFalse(UserTask.objects.all_with_deleted().filter(id__in=self.deletions).exists())
+        self.assertFalse(UserTaskClosure.objects.filter(descendant_id__in=self.deletions).exists())
+        archived = ArchivedTask.objects.in_bulk(list(self.deletions))
+        self.assertEqual(
+            {task_id: (task.deleted_at, task.deletion_id) for task_id, task in archived.items()},
+            self.deletions
+        )
+
+    def assert_closure_rebuilt(self):
+        self.assertEqual(
+            set(UserTaskClosure.objects.filter(
+                ancestor_id__in=self.deletions, descendant_id__in=self.deletions
+            ).values_list(
+                'ancestor_id', 'descendant_id', 'depth'
+            )),
+            {
+                (self.root.id, self.root.id, 0), (self.child.id, self.child.id, 0),
+                (self.grandchild.id, self.grandchild.id, 0), (self.root.id, self.child.id, 1),
+                (self.child.id, self.grandchild.id, 1), (self.root.id, self.grandchild.id, 2),
+            }
+        )
+
+    def deleted_flags(self):
+        return dict(UserTask.objects.all_with_deleted().filter(id__in=self.deletions).values_list('id', 'is_deleted'))
+
+    def test_restore_puts_the_subtree_back_in_the_trash(self):
+        self.archive()
+
+        self.assertEqual(restore_archived_tasks([self.root.id]), (3, 0))
+        self.assert_closure_rebuilt()
+        self.assertEqual(self.deleted_flags(), dict.fromkeys(self.deletions, True))
+        self.assertEqual(self.deletion_state(), self.deletions)
+        self.assertFalse(ArchivedTask.objects.exists())
+
+    def test_undelete_restores_only_the_tasks_deleted_together(self):
+        self.archive()
+
+        self.assertEqual(restore_archived_tasks([self.root.id], undelete=True), (3, 2))
+        self.assert_closure_rebuilt()
+        self.assertEqual(
+            self.deleted_flags(),
+            {self.root.id: False, self.child.id: False, self.grandchild.id: True}
+        )
+        # The grandchild was deleted on its own and can still be restored as such
+        self.assertEqual(self.deletion_state()[self.grandchild.id], self.deletions[self.grandchild.id])
+        self.assertEqual(UserTask.objects.restore_subtrees([self.grandchild.id]), 1)
+
+    def test_undelete_leaves_tasks_under_a_deleted_parent_in_the_trash(self):
+        self.archive()
+        self.parent.soft_delete()
+
+        self.assertEqual(restore_archived_tasks([self.root.id], undelete=True), (3, 0))
+        self.assertEqual(self.deleted_flags(), dict.fromkeys(self.deletions, True))
+        self.assertTrue(UserTaskClosure.objects.filter(ancestor=self.parent, descendant=self.grandchild, depth=3).exists())
+
+
+class QueryPlanTests(TestCase):
+    """Every main endpoint query can be served by an index (see tasks/query_plans.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for role_name in ('administrator', 'moderator', 'user'):
+            role = Role.objects.create(name=role_name)
+            cls.users[role_name] = User.objects.create_user(
+                f'{role_name}@example.com', 'secret-password', name=role_name.title(), surname='Planner', role=role
+            )
+        seed_plan_data(task_count=20000, user_count=2000, role_id=cls.users['user'].role_id)
+
+    def test_main_queries_use_indexes(self):
+        # Next pages and delta syncs start a few minutes back, so they match
+        # a small share of the fixture as they do of a real table
+        for name, queryset in plan_checks(self.users, window=timedelta(minutes=2)):
+            with self.subTest(name):
+                problem, indexes = plan_problem(queryset)
+                self.assertIsNone(problem, f'{name} uses {indexes}')
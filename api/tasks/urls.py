@@ -3,13 +3,21 @@ from .views import (
     TaskListCreateView,
     TaskDetailView,
     TaskDeleteView,
+    TaskRestoreView,
     PublicTaskListView,
+    TaskBatchView,
+    TaskSyncView,
+    TaskEventStreamView,
 )
 
 urlpatterns = [
     # Task endpoints
     path('', TaskListCreateView.as_view(), name='task-list-create'),
     path('public/', PublicTaskListView.as_view(), name='public-task-list'),
+    path('batch/', TaskBatchView.as_view(), name='task-batch'),
+    path('sync/', TaskSyncView.as_view(), name='task-sync'),
+    path('events/', TaskEventStreamView.as_view(), name='task-events'),
     path('<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
     path('<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
+    path('<int:pk>/restore/', TaskRestoreView.as_view(), name='task-restore'),
 ]
@@ -1,12 +1,14 @@
 from django.urls import path
 from .views import (
-    user_list_view,
+    UserListView,
     promote_user_view,
     demote_user_view,
+    bulk_role_change_view,
 )
 
 urlpatterns = [
-    path('', user_list_view, name='user-list'),
+    path('', UserListView.as_view(), name='user-list'),
     path('<int:user_id>/promote/', promote_user_view, name='promote-user'),
     path('<int:user_id>/demote/', demote_user_view, name='demote-user'),
+    path('roles/', bulk_role_change_view, name='bulk-role-change'),
 ]
@@ -1,122 +1,368 @@
 from rest_framework import status, generics, permissions as drf_permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ValidationError
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from django.db import models
+from django.views import View
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 from .models import UserTask
-from .serializers import UserTaskSerializer
-from .permissions import IsTaskOwnerOrModeratorOrAdmin, IsAdministrator
-from accounts.models import User, Role
-from accounts.serializers import UserSerializer
+from .serializers import TaskBatchSerializer, TaskSyncSerializer, UserTaskSerializer, build_subtask_map
+from .batch import TaskBatch
+from .pagination import TaskCursorPagination, TaskSearchPagination, TaskSyncPagination, UserCursorPagination
+from .events import task_events
+from .feed import public_feed
+from .permissions import IsTaskOwnerOrModeratorOrAdmin, IsAdministrator, filter_visible_tasks
+from .search import search_tasks
+from accounts.authentication import ClaimsJWTAuthentication
+from accounts.models import User
+from accounts.roles import role_registry
+from accounts.serializers import BulkRoleChangeSerializer, UserSerializer
 
 
-class PublicTaskListView(generics.ListAPIView):
-    """Public task list endpoint that doesn't require authentication."""
+class SubtaskTreeMixin:
+    """Serialize tasks with their whole subtask tree preloaded.
+    
+    Read responses get a ``subtask_map`` in the serializer context, built with
+    one query for all descendants instead of one query per node.
+    """
+    
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None and 'data' not in kwargs:
+            tasks = args[0] if kwargs.get('many') else [args[0]]
+            kwargs.setdefault('context', self.get_serializer_context())
+            kwargs['context']['subtask_map'] = build_subtask_map(tasks)
+        return super().get_serializer(*args, **kwargs)
+
+
+class TaskSearchMixin:
+    """Full-text search of task lists with ``?q=`` (see tasks/search.py).
+    
+    Matches are ranked and paginated best match first; without ``q`` the
+    view's own pagination applies.
+    """
+    search_query_param = 'q'
+    
+    def get_search_text(self):
+        return self.request.query_params.get(self.search_query_param, '').strip()
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = TaskSearchPagination() if self.get_search_text() else self.pagination_class()
+        return self._paginator
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        search_text = self.get_search_text()
+        return search_tasks(queryset, search_text) if search_text else queryset
+
+
+class PublicTaskListView(TaskSearchMixin, SubtaskTreeMixin, generics.ListAPIView):
+    """Public task list endpoint that doesn't require authentication.
+    
+    Pages are served from the pre-rendered public feed cache and support
+    conditional requests, so repeat visitors get a 304 without a database hit.
+    Search results (``?q=``) are not cached.
+    """
     serializer_class = UserTaskSerializer
     permission_classes = [drf_permissions.AllowAny]
+    authentication_classes = []
+    pagination_class = TaskCursorPagination
     
     def get_queryset(self):
         """Return all non-deleted tasks."""
-        return UserTask.objects.filter(is_deleted=False)
+        return UserTask.objects.filter(is_deleted=False).select_related('user__role')
+    
+    def list(self, request, *args, **kwargs):
+        """Return the requested page from the feed cache, rendering it on a miss."""
+        if self.get_search_text():
+            return super().list(request, *args, **kwargs)
+        
+        paginator = self.paginator
+        key = public_feed.page_key(
+            request.get_host(),
+            paginator.get_page_size(request),
+            request.query_params.get(paginator.cursor_query_param)
+        )
+        entry = public_feed.get_page(key)
+        
+        if entry is None:
+            sequence = public_feed.current_sequence()
+            data = super().list(request, *args, **kwargs).data
+            upper = paginator.decode_cursor(paginator.cursor, UserTask)
+            lower = paginator.get_position(paginator.page[-1]) if paginator.has_next else None
+            entry = public_feed.store_page(
+                key,
+                JSONRenderer().render(data),
+                tuple(upper) if upper else None,
+                tuple(lower) if lower else None,
+                sequence
+            )
+        
+        if entry['etag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry['content'], content_type='application/json')
+        response['ETag'] = entry['etag']
+        response['Cache-Control'] = 'no-cache'
+        return response
 
 
-class TaskListCreateView(generics.ListCreateAPIView):
-    """List and create tasks."""
+class TaskListCreateView(TaskSearchMixin, SubtaskTreeMixin, generics.ListCreateAPIView):
+    """List, search and create tasks."""
     serializer_class = UserTaskSerializer
     permission_classes = [drf_permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = TaskCursorPagination
     
     def get_queryset(self):
         """Return tasks based on user role and optional group filter."""
         user = self.request.user
-        queryset = None
-        
-        if user.is_administrator():
-            # Administrators see all non-deleted tasks
-            queryset = UserTask.objects.all()
-        elif user.is_moderator():
-            # Moderators see all user tasks and their own tasks
-            user_role = Role.objects.filter(name='user').first()
-            if user_role:
-                queryset = UserTask.objects.filter(
-                    models.Q(user__role=user_role) | models.Q(user=user)
-                )
-            else:
-                queryset = UserTask.objects.filter(user=user)
-        else:
-            # Users see only their own tasks
-            queryset = UserTask.objects.filter(user=user)
+        queryset = filter_visible_tasks(user, UserTask.objects.all())
         
         # Apply group filter if provided
         group_filter = self.request.query_params.get('group', None)
         if group_filter and (user.is_administrator() or user.is_moderator()):
-            role = Role.objects.filter(name=group_filter).first()
-            if role:
-                queryset = queryset.filter(user__role=role)
+            role_id = role_registry.role_id(group_filter)
+            if role_id:
+                queryset = queryset.filter(user__role_id=role_id)
         
-        return queryset
+        return queryset.select_related('user__role')
+    
+    def list(self, request, *args, **kwargs):
+        """List tasks with a watermark to delta-sync from (see TaskSyncView)."""
+        watermark = TaskSyncPagination().checkpoint()
+        response = super().list(request, *args, **kwargs)
+        response['X-Sync-Watermark'] = watermark
+        return response
     
     def perform_create(self, serializer):
         """Create a new task."""
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
 
-class TaskDetailView(generics.RetrieveUpdateAPIView):
+class TaskDetailView(SubtaskTreeMixin, generics.RetrieveUpdateAPIView):
     """Retrieve and update a task."""
     serializer_class = UserTaskSerializer
     permission_classes = [drf_permissions.IsAuthenticated, IsTaskOwnerOrModeratorOrAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         """Return tasks based on user role."""
-        user = self.request.user
-        
-        if user.is_administrator():
-            return UserTask.objects.all()
-        elif user.is_moderator():
-            user_role = Role.objects.filter(name='user').first()
-            if user_role:
-                return UserTask.objects.filter(
-                    models.Q(user__role=user_role) | models.Q(user=user)
-                )
-            return UserTask.objects.filter(user=user)
-        else:
-            return UserTask.objects.filter(user=user)
+        return filter_visible_tasks(self.request.user, UserTask.objects.all())
 
 
 class TaskDeleteView(generics.DestroyAPIView):
     """Delete a task (soft delete)."""
     serializer_class = UserTaskSerializer
     permission_classes = [drf_permissions.IsAuthenticated, IsTaskOwnerOrModeratorOrAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         """Return tasks based on user role."""
-        user = self.request.user
-        
-        if user.is_administrator():
-            return UserTask.objects.all()
-        elif user.is_moderator():
-            user_role = Role.objects.filter(name='user').first()
-            if user_role:
-                return UserTask.objects.filter(
-                    models.Q(user__role=user_role) | models.Q(user=user)
-                )
-            return UserTask.objects.filter(user=user)
-        else:
-            return UserTask.objects.filter(user=user)
+        return filter_visible_tasks(self.request.user, UserTask.objects.all())
     
     def destroy(self, request, *args, **kwargs):
-        """Soft delete the task."""
+        """Soft delete the task together with all of its subtasks."""
         task = self.get_object()
-        task.soft_delete()
-        return Response({'message': 'Task deleted successfully'}, status=status.HTTP_200_OK)
+        deleted_count = task.soft_delete()
+        return Response({
+            'message': 'Task deleted successfully',
+            'deleted_count': deleted_count
+        }, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
-@permission_classes([IsAdministrator])
-def user_list_view(request):
-    """List all users (Administrator only)."""
-    users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+class TaskRestoreView(generics.GenericAPIView):
+    """Restore a soft-deleted task together with all of its subtasks."""
+    serializer_class = UserTaskSerializer
+    permission_classes = [drf_permissions.IsAuthenticated, IsTaskOwnerOrModeratorOrAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
+    
+    def get_queryset(self):
+        """Return deleted tasks based on user role."""
+        return filter_visible_tasks(self.request.user, UserTask.objects.only_deleted())
+    
+    def post(self, request, *args, **kwargs):
+        """Restore the task subtree."""
+        task = self.get_object()
+        if task.parent_id and task.get_ancestors().filter(is_deleted=True).exists():
+            return Response({
+                'error': 'Parent task is deleted. Restore the parent task first.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        restored_count = task.restore()
+        return Response({
+            'message': 'Task restored successfully',
+            'restored_count': restored_count
+        }, status=status.HTTP_200_OK)
+
+
+class TaskSyncView(generics.ListAPIView):
+    """Return the visible tasks changed since a watermark, oldest change first.
+    
+    Without ``since`` this is a snapshot of all live tasks. With it, tasks
+    soft-deleted since the watermark come back as ``deleted_ids`` tombstones.
+    Clients repeat the call with the returned ``watermark`` while
+    ``has_more`` is true.
+    """
+    serializer_class = TaskSyncSerializer
+    permission_classes = [drf_permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = TaskSyncPagination
+    
+    def get_queryset(self):
+        """Return visible tasks, including soft-deleted ones for a delta."""
+        if self.request.query_params.get(self.paginator.cursor_query_param):
+            queryset = UserTask.objects.all_with_deleted()
+        else:
+            queryset = UserTask.objects.all()
+        return filter_visible_tasks(self.request.user, queryset).select_related('user__role')
+    
+    def list(self, request, *args, **kwargs):
+        """Return changed tasks, tombstones and the next watermark."""
+        page = self.paginate_queryset(self.get_queryset())
+        live_tasks = [task for task in page if not task.is_deleted]
+        return Response({
+            'tasks': self.get_serializer(live_tasks, many=True).data,
+            'deleted_ids': [task.id for task in page if task.is_deleted],
+            'watermark': self.paginator.get_watermark(),
+            'has_more': self.paginator.has_next
+        }, status=status.HTTP_200_OK)
+
+
+class TaskEventStreamView(View):
+    """Stream task change events to the client as server-sent events.
+    
+    Every create, update and delete of a task the user can see (by the rules
+    of filter_visible_tasks) is sent as a ``tasks`` event carrying the type
+    and task ids; clients then call the delta sync endpoint. ``resync`` asks
+    for a sync after events were missed, and ``expired`` ends the stream when
+    the access token expires. Authenticates with the Authorization header or
+    the access token cookie, since EventSource cannot set headers.
+    
+    Idle streams hold no thread, so this needs an ASGI server.
+    """
+    
+    def authenticate(self, request):
+        """Return (principal, token expiry timestamp) for the request's access token."""
+        authentication = ClaimsJWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raw_token = request.COOKIES.get(getattr(settings, 'JWT_COOKIE_NAME', 'access_token'))
+        if not raw_token:
+            raise AuthenticationFailed('Authentication credentials were not provided.')
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token), validated_token['exp']
+    
+    def describe(self, request):
+        principal, expires_at = self.authenticate(request)
+        return principal.id, task_events.visibility_scope(principal), expires_at
+    
+    async def get(self, request, *args, **kwargs):
+        """Open the event stream."""
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({
+                'error': 'The task event stream needs an ASGI server; poll /api/tasks/sync/ instead'
+            }, status=status.HTTP_501_NOT_IMPLEMENTED)
+        
+        try:
+            user_id, scope, expires_at = await sync_to_async(self.describe)(request)
+        except (AuthenticationFailed, InvalidToken) as exc:
+            detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+            return JsonResponse({'error': str(detail)}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        response = StreamingHttpResponse(
+            task_events.stream(user_id, scope, expires_at),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class TaskBatchView(generics.GenericAPIView):
+    """Apply a batch of task create, update and delete operations.
+    
+    Every operation is permission-checked with the rules of
+    IsTaskOwnerOrModeratorOrAdmin and reported on separately; the valid
+    ones are written in one transaction (see tasks/batch.py).
+    """
+    serializer_class = TaskBatchSerializer
+    permission_classes = [drf_permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    
+    def post(self, request, *args, **kwargs):
+        """Apply the operations and return one result per operation."""
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'error': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        batch = TaskBatch(request.user, serializer.validated_data['operations'])
+        results = batch.apply()
+        return Response({
+            'created_count': batch.counts['created'],
+            'updated_count': batch.counts['updated'],
+            'deleted_count': batch.counts['deleted'],
+            'results': results
+        }, status=status.HTTP_200_OK)
+
+
+class UserListView(generics.ListAPIView):
+    """List users page by page (Administrator only).
+    
+    Supports ``role`` (role name), ``account_status`` (default: active),
+    ``is_active`` (true/false) and ``search``, a case-insensitive substring
+    of the email or full name served by trigram indexes.
+    """
+    serializer_class = UserSerializer
+    permission_classes = [IsAdministrator]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = UserCursorPagination
+    
+    def get_queryset(self):
+        """Return users matching the query parameters."""
+        params = self.request.query_params
+        
+        account_status = params.get('account_status')
+        if account_status:
+            if account_status not in User.AccountStatus.values:
+                raise ValidationError({'account_status': f'Must be one of: {", ".join(User.AccountStatus.values)}'})
+            queryset = User.objects.all_with_deleted().filter(account_status=account_status)
+        else:
+            queryset = User.objects.all()
+        
+        role = params.get('role')
+        if role:
+            role_id = role_registry.role_id(role)
+            if not role_id:
+                raise ValidationError({'role': f'Unknown role: {role}'})
+            queryset = queryset.filter(role_id=role_id)
+        
+        is_active = params.get('is_active')
+        if is_active:
+            if is_active.lower() not in ('true', 'false', '1', '0'):
+                raise ValidationError({'is_active': 'Must be true or false'})
+            queryset = queryset.filter(is_active=is_active.lower() in ('true', '1'))
+        
+        search = params.get('search', '').strip()
+        if search:
+            # icontains compiles to UPPER(col) LIKE UPPER('%...%'), which the
+            # GIN trigram indexes on UPPER(email) and UPPER(full_name) serve
+            queryset = queryset.filter(
+                models.Q(email__icontains=search) | models.Q(full_name__icontains=search)
+            )
+        
+        return queryset.select_related('role')
 
 
 @api_view(['POST'])
@@ -124,15 +370,15 @@ def user_list_view(request):
 def promote_user_view(request, user_id):
     """Promote user to moderator (Administrator only)."""
     user = get_object_or_404(User, id=user_id)
-    moderator_role = Role.objects.filter(name='moderator').first()
+    moderator_role = role_registry.get_by_name('moderator')
     
     if not moderator_role:
         return Response({
             'error': 'Moderator role does not exist'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    user_role = Role.objects.filter(name='user').first()
-    if user.role == user_role:
+    user_role = role_registry.get_by_name('user')
+    if user_role and user.role_id == user_role.id:
         user.role = moderator_role
         user.save()
         return Response({
@@ -150,15 +396,15 @@ def promote_user_view(request, user_id):
 def demote_user_view(request, user_id):
     """Demote moderator to user (Administrator only)."""
     user = get_object_or_404(User, id=user_id)
-    moderator_role = Role.objects.filter(name='moderator').first()
-    user_role = Role.objects.filter(name='user').first()
+    moderator_role = role_registry.get_by_name('moderator')
+    user_role = role_registry.get_by_name('user')
     
     if not user_role:
         return Response({
             'error': 'User role does not exist'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if user.role == moderator_role:
+    if moderator_role and user.role_id == moderator_role.id:
         user.role = user_role
         user.save()
         return Response({
@@ -169,3 +415,36 @@ def demote_user_view(request, user_id):
         return Response({
             'error': 'User is not a moderator'
         }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdministrator])
+def bulk_role_change_view(request):
+    """Promote or demote many users at once (Administrator only).
+    
+    Takes ``user_ids`` and a target ``role`` (moderator or user); every id
+    gets its own result, and the valid ones are changed in one UPDATE.
+    """
+    serializer = BulkRoleChangeSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'error': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    role = serializer.validated_data['role']
+    try:
+        errors = User.objects.change_roles(serializer.validated_data['user_ids'], role)
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = [
+        {'id': user_id, 'changed': error is None, **({'error': error} if error else {})}
+        for user_id, error in errors.items()
+    ]
+    return Response({
+        'role': role,
+        'changed_count': sum(result['changed'] for result in results),
+        'results': results
+    }, status=status.HTTP_200_OK)
@@ -35,21 +35,51 @@ if (typeof getAuthHeaders === 'undefined') {
     }
 }
 
-// Load users list
-async function loadUsers() {
+// Users loaded so far and the cursor of the next page (null when exhausted)
+let loadedUsers = [];
+let nextUsersCursor = null;
+let userFiltersTimer = null;
+
+// Build the query string of the user directory filters
+function getUserFilterParams() {
+    const params = new URLSearchParams();
+    const filters = {
+        search: 'userSearch',
+        role: 'userRoleFilter',
+        account_status: 'userStatusFilter',
+        is_active: 'userActiveFilter'
+    };
+    for (const [param, elementId] of Object.entries(filters)) {
+        const element = document.getElementById(elementId);
+        const value = element ? element.value.trim() : '';
+        if (value) params.set(param, value);
+    }
+    return params;
+}
+
+// Load users list (first page, or the next page when append is true)
+async function loadUsers(append = false) {
     const usersList = document.getElementById('usersList');
     if (!usersList) return;
     
+    const params = getUserFilterParams();
+    if (append && nextUsersCursor) {
+        params.set('cursor', nextUsersCursor);
+    }
+    const query = params.toString();
+    
     try {
-        const response = await fetch(`${API_BASE_URL}/users/`, {
+        const response = await fetch(`${API_BASE_URL}/users/${query ? `?${query}` : ''}`, {
             method: 'GET',
             headers: getAuthHeaders(),
             credentials: 'include'
         });
         
         if (response.ok) {
-            const users = await response.json();
-            displayUsers(users);
+            const page = await response.json();
+            loadedUsers = append ? loadedUsers.concat(page.results) : page.results;
+            nextUsersCursor = page.next_cursor;
+            displayUsers(loadedUsers);
         } else {
             usersList.innerHTML = '<p class="error">Не удалось загрузить пользователей</p>';
         }
@@ -59,6 +89,17 @@ async function loadUsers() {
     }
 }
 
+// Load the next page of users
+function loadMoreUsers() {
+    loadUsers(true);
+}
+
+// Reload the first page when a filter changes (debounced for typing)
+function applyUserFilters() {
+    clearTimeout(userFiltersTimer);
+    userFiltersTimer = setTimeout(() => loadUsers(), 300);
+}
+
 // Display users
 function displayUsers(users) {
     const usersList = document.getElementById('usersList');
@@ -69,7 +110,7 @@ function displayUsers(users) {
         return;
     }
     
-    const usersHTML = users.map(user => {
+    let usersHTML = users.map(user => {
         let actionButtons = '';
         // Check both role_name and role fields (role_name from serializer, role for compatibility)
         const userRole = user.role_name || user.role || '';
@@ -98,6 +139,10 @@ function displayUsers(users) {
         `;
     }).join('');
     
+    if (nextUsersCursor) {
+        usersHTML += '<button class="btn btn-secondary" onclick="loadMoreUsers()">Показать ещё</button>';
+    }
+    
     usersList.innerHTML = usersHTML;
 }
 
@@ -165,5 +210,7 @@ function escapeHtml(text) {
 
 // Make functions globally available
 window.loadUsers = loadUsers;
+window.loadMoreUsers = loadMoreUsers;
+window.applyUserFilters = applyUserFilters;
 window.promoteUser = promoteUser;
 window.demoteUser = demoteUser;
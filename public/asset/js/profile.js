@@ -387,6 +387,19 @@ async function updateProfile() {
     }
 }
 
+// Store tokens reissued after a credential change (older tokens are revoked)
+function storeReissuedTokens(data) {
+    if (data.access_token) {
+        sessionStorage.setItem('access_token', data.access_token);
+    }
+    if (data.refresh_token) {
+        sessionStorage.setItem('refresh_token', data.refresh_token);
+    }
+    if (data.expires_at) {
+        sessionStorage.setItem('expires_at', data.expires_at);
+    }
+}
+
 // Change email
 async function changeEmail() {
     // Use utility function from auth.js if available, otherwise fallback to direct manipulation
@@ -444,7 +457,8 @@ async function changeEmail() {
         
         if (response.ok) {
             const data = await response.json();
-            alert('Email успешно изменен. Пожалуйста, войдите снова, используя новый email.');
+            storeReissuedTokens(data);
+            alert('Email успешно изменен. На других устройствах войдите снова, используя новый email.');
             
             // Clear form
             document.getElementById('newEmail').value = '';
@@ -540,6 +554,8 @@ async function changePassword() {
         });
         
         if (response.ok) {
+            const data = await response.json();
+            storeReissuedTokens(data);
             alert('Пароль успешно изменен');
             // Clear form
             document.getElementById('oldPassword').value = '';
@@ -28,8 +28,8 @@ async function loadPublicTasks() {
         });
         
         if (response.ok) {
-            const tasks = await response.json();
-            displayPublicTasks(tasks);
+            const page = await response.json();
+            displayPublicTasks(page.results);
         } else {
             publicTasksContainer.innerHTML = '<p class="error">Не удалось загрузить задачи. Пожалуйста, попробуйте позже.</p>';
         }
@@ -18,18 +18,25 @@ function getCookie(name) {
 // No need to redefine them here - they're available from auth.js
 
 let allTasks = [];
+let loadedTasks = [];
+let nextTasksCursor = null;
 let currentGroup = 'all';
 let sortColumn = null;
 let sortDirection = 'asc';
 
-// Load tasks
-async function loadTasks(group = 'all') {
+// Load tasks (first page, or the next page when append is true)
+async function loadTasks(group = 'all', append = false) {
     const container = document.getElementById('tasksContainer');
-    container.innerHTML = '<div class="loading">Загрузка задач...</div>';
+    if (!append) {
+        container.innerHTML = '<div class="loading">Загрузка задач...</div>';
+    }
     
     try {
         // Use public endpoint that doesn't require authentication
-        const url = `${API_BASE_URL}/tasks/public/`;
+        let url = `${API_BASE_URL}/tasks/public/`;
+        if (append && nextTasksCursor) {
+            url += `?cursor=${encodeURIComponent(nextTasksCursor)}`;
+        }
         
         const response = await fetch(url, {
             method: 'GET',
@@ -40,7 +47,10 @@ async function loadTasks(group = 'all') {
         });
         
         if (response.ok) {
-            allTasks = await response.json();
+            const page = await response.json();
+            loadedTasks = append ? loadedTasks.concat(page.results) : page.results;
+            nextTasksCursor = page.next_cursor;
+            allTasks = loadedTasks;
             // Filter by group if needed (client-side filtering for public endpoint)
             if (group !== 'all') {
                 allTasks = allTasks.filter(task => {
@@ -58,12 +68,21 @@ async function loadTasks(group = 'all') {
     }
 }
 
+// Load the next page of tasks
+function loadMoreTasks() {
+    loadTasks(currentGroup, true);
+}
+
 // Display tasks in table
 function displayTasks(tasks) {
     const container = document.getElementById('tasksContainer');
     
+    const loadMoreHTML = nextTasksCursor
+        ? '<button class="btn btn-secondary" onclick="loadMoreTasks()">Показать ещё</button>'
+        : '';
+    
     if (tasks.length === 0) {
-        container.innerHTML = '<div class="loading">Задачи не найдены</div>';
+        container.innerHTML = '<div class="loading">Задачи не найдены</div>' + loadMoreHTML;
         return;
     }
     
@@ -149,6 +168,7 @@ function displayTasks(tasks) {
                 }).join('')}
             </tbody>
         </table>
+        ${loadMoreHTML}
     `;
     
     container.innerHTML = tableHTML;
@@ -228,3 +248,4 @@ document.addEventListener('DOMContentLoaded', async function() {
 // Make functions globally available
 window.filterByGroup = filterByGroup;
 window.sortTasks = sortTasks;
+window.loadMoreTasks = loadMoreTasks;
@@ -17,21 +17,45 @@ function getCookie(name) {
 // These functions are global and handle sessionStorage, cookies, and timezone correctly
 // No need to redefine them here - they're available from auth.js
 
-// Load tasks
-async function loadTasks() {
+// Tasks loaded so far and the cursor of the next page (null when exhausted)
+let loadedTasks = [];
+let nextTasksCursor = null;
+
+// Watermark of the last delta sync (see syncTasks), the change event stream
+// and the polling timer used when the stream is unavailable
+let syncWatermark = null;
+let syncTimer = null;
+let taskEvents = null;
+let eventSyncTimeout = null;
+const SYNC_INTERVAL_MS = 15000;
+const EVENT_SYNC_DELAY_MS = 300;
+
+// Load tasks (first page, or the next page when append is true)
+async function loadTasks(append = false) {
     const tasksList = document.getElementById('tasksList');
     if (!tasksList) return;
     
+    let url = `${API_BASE_URL}/tasks/`;
+    if (append && nextTasksCursor) {
+        url += `?cursor=${encodeURIComponent(nextTasksCursor)}`;
+    }
+    
     try {
-        const response = await fetch(`${API_BASE_URL}/tasks/`, {
+        const response = await fetch(url, {
             method: 'GET',
             headers: getAuthHeaders(),
             credentials: 'include'
         });
         
         if (response.ok) {
-            const tasks = await response.json();
-            displayTasks(tasks);
+            const page = await response.json();
+            loadedTasks = append ? loadedTasks.concat(page.results) : page.results;
+            nextTasksCursor = page.next_cursor;
+            if (!append) {
+                syncWatermark = response.headers.get('X-Sync-Watermark');
+                startTaskSync();
+            }
+            displayTasks(loadedTasks);
         } else {
             if (response.status === 401) {
                 tasksList.innerHTML = '<p class="error">Не авторизован. Пожалуйста, <a href="/login/">войдите</a>.</p>';
@@ -45,6 +69,123 @@ async function loadTasks() {
     }
 }
 
+// Load the next page of tasks
+function loadMoreTasks() {
+    loadTasks(true);
+}
+
+// Fetch only the tasks changed since the last sync and merge them into the list
+async function syncTasks() {
+    if (!syncWatermark) {
+        return loadTasks();
+    }
+    
+    try {
+        let hasMore = true;
+        let changed = false;
+        while (hasMore) {
+            const response = await fetch(`${API_BASE_URL}/tasks/sync/?since=${encodeURIComponent(syncWatermark)}`, {
+                method: 'GET',
+                headers: getAuthHeaders(),
+                credentials: 'include'
+            });
+            if (!response.ok) {
+                // Expired or invalid watermark: start over from the first page
+                return loadTasks();
+            }
+            
+            const delta = await response.json();
+            changed = mergeTaskChanges(delta.tasks, delta.deleted_ids) || changed;
+            syncWatermark = delta.watermark;
+            hasMore = delta.has_more;
+        }
+        if (changed) {
+            displayTasks(loadedTasks);
+        }
+    } catch (error) {
+        console.error('Sync tasks error:', error);
+    }
+}
+
+// Apply changed tasks and tombstones to loadedTasks; return true if anything changed
+function mergeTaskChanges(changedTasks, deletedIds) {
+    const loadedIds = new Set(loadedTasks.map(task => task.id));
+    const deleted = new Set(deletedIds);
+    let changed = deletedIds.some(id => loadedIds.has(id));
+    
+    loadedTasks = loadedTasks.filter(task => !deleted.has(task.id));
+    changedTasks.forEach(task => {
+        const index = loadedTasks.findIndex(loaded => loaded.id === task.id);
+        if (index !== -1) {
+            loadedTasks[index] = task;
+            changed = true;
+        } else if (!task.parent_id || loadedTasks.some(loaded => loaded.id === task.parent_id)) {
+            // New task on the first page or under a loaded task; older ones arrive with their page
+            loadedTasks.unshift(task);
+            changed = true;
+        }
+    });
+    return changed;
+}
+
+// Sync on change events from the server, or poll when the stream is unavailable
+function startTaskSync() {
+    if (taskEvents || syncTimer) return;
+    if (!window.EventSource) {
+        startTaskPolling();
+        return;
+    }
+    
+    taskEvents = new EventSource(`${API_BASE_URL}/tasks/events/`, { withCredentials: true });
+    taskEvents.addEventListener('ready', () => {
+        stopTaskPolling();
+        // Catch up on changes made while the stream was down
+        scheduleEventSync();
+    });
+    taskEvents.addEventListener('tasks', scheduleEventSync);
+    taskEvents.addEventListener('resync', scheduleEventSync);
+    taskEvents.addEventListener('expired', () => {
+        // Reconnect with the refreshed access token cookie
+        stopTaskEvents();
+        syncTasks().then(startTaskSync);
+    });
+    taskEvents.onerror = () => {
+        // The browser retries dropped streams itself; refused ones are closed
+        if (taskEvents && taskEvents.readyState === EventSource.CLOSED) {
+            stopTaskEvents();
+            startTaskPolling();
+        }
+    };
+}
+
+// Coalesce bursts of change events into one delta sync
+function scheduleEventSync() {
+    clearTimeout(eventSyncTimeout);
+    eventSyncTimeout = setTimeout(syncTasks, EVENT_SYNC_DELAY_MS);
+}
+
+function stopTaskEvents() {
+    if (taskEvents) {
+        taskEvents.close();
+        taskEvents = null;
+    }
+}
+
+// Poll for changes while the page is visible
+function startTaskPolling() {
+    if (syncTimer) return;
+    syncTimer = setInterval(() => {
+        if (!document.hidden) {
+            syncTasks();
+        }
+    }, SYNC_INTERVAL_MS);
+}
+
+function stopTaskPolling() {
+    clearInterval(syncTimer);
+    syncTimer = null;
+}
+
 // Display tasks with nested support
 function displayTasks(tasks) {
     const tasksList = document.getElementById('tasksList');
@@ -58,7 +199,11 @@ function displayTasks(tasks) {
     // Filter out subtasks (they will be displayed under their parents)
     const topLevelTasks = tasks.filter(task => !task.parent_id);
     
-    const tasksHTML = topLevelTasks.map(task => renderTask(task, tasks, 0)).join('');
+    let tasksHTML = topLevelTasks.map(task => renderTask(task, tasks, 0)).join('');
+    
+    if (nextTasksCursor) {
+        tasksHTML += '<button class="btn btn-secondary" onclick="loadMoreTasks()">Показать ещё</button>';
+    }
     
     tasksList.innerHTML = tasksHTML;
 }
@@ -145,7 +290,7 @@ async function createTask(parentId = null) {
         if (response.ok) {
             titleInput.value = '';
             descriptionInput.value = '';
-            loadTasks();
+            syncTasks();
         } else {
             const data = await response.json();
             alert(data.error || 'Не удалось создать задачу');
@@ -179,7 +324,7 @@ async function createSubtask(parentId) {
         });
         
         if (response.ok) {
-            loadTasks();
+            syncTasks();
         } else {
             const data = await response.json();
             alert(data.error || 'Не удалось создать подзадачу');
@@ -237,7 +382,7 @@ async function updateTask(taskId, taskData) {
         });
         
         if (response.ok) {
-            loadTasks();
+            syncTasks();
         } else {
             const data = await response.json();
             alert(data.error || 'Не удалось обновить задачу');
@@ -273,7 +418,7 @@ async function deleteTask(taskId) {
         });
         
         if (response.ok) {
-            loadTasks();
+            syncTasks();
         } else {
             const data = await response.json();
             alert(data.error || 'Не удалось удалить задачу');
@@ -300,3 +445,5 @@ window.updateTaskStatus = updateTaskStatus;
 window.editTask = editTask;
 window.updateTask = updateTask;
 window.loadTasks = loadTasks;
+window.loadMoreTasks = loadMoreTasks;
+window.syncTasks = syncTasks;